@@ -0,0 +1,44 @@
+"""Recompute every dictionary entry's attempt count, score sum and last attempt time from ExerciseLog."""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/backfill_attempt_stats.py --batch-size 1000
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+
+env_path = PROJECT_ROOT / ".env"
+if env_path.exists():
+    load_dotenv(env_path)
+else:
+    load_dotenv()
+
+from source import attempt_stats  # noqa: E402
+from source.database import database  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=attempt_stats.BACKFILL_BATCH_SIZE,
+        help=f"Entries updated per transaction (default: {attempt_stats.BACKFILL_BATCH_SIZE}).",
+    )
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with database.connection_context():
+        updated = attempt_stats.backfill(batch_size=max(1, args.batch_size))
+    print(f"updated {updated} entries in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
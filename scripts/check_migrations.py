@@ -0,0 +1,174 @@
+"""
+Upgrade databases created before the migrations existed and check that they end
+up with the same tables, columns and indexes as a freshly migrated one, and that
+every model column exists. Runs against temporary SQLite databases.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/check_migrations.py
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Never touch the configured database.
+os.environ.pop("DATABASE_URL", None)
+os.environ["SQLITE_PATH"] = ":memory:"
+
+from source import migrations  # noqa: E402
+from source.base import Base  # noqa: E402
+from source.database import database  # noqa: E402
+
+# Schemas the app built itself before schema_migrations, oldest last.
+LEGACY_SCHEMAS = {
+    # What init_database created when the migrations were introduced.
+    "pre_migrations": [
+        'CREATE TABLE "user" ("id" INTEGER NOT NULL PRIMARY KEY, "username" VARCHAR(255) NOT NULL, '
+        '"password_hash" VARCHAR(255) NOT NULL)',
+        'CREATE UNIQUE INDEX "user_username" ON "user" ("username")',
+        'CREATE TABLE "dictionaryentry" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL, '
+        '"text" TEXT NOT NULL, "translation" TEXT, "notes" TEXT, "is_external_input" INTEGER NOT NULL, '
+        '"created_at" DATETIME, "last_seen_at" DATETIME, "probability_score" REAL NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE)',
+        'CREATE INDEX "dictionaryentry_user_id" ON "dictionaryentry" ("user_id")',
+        'CREATE TABLE "dailyexercisetotal" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL, '
+        '"day" DATE NOT NULL, "count" INTEGER NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE)',
+        'CREATE INDEX "dailyexercisetotal_user_id" ON "dailyexercisetotal" ("user_id")',
+        'CREATE UNIQUE INDEX "dailyexercisetotal_user_id_day" ON "dailyexercisetotal" ("user_id", "day")',
+        'CREATE TABLE "exerciselog" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL, '
+        '"entry_id" INTEGER, "kind" VARCHAR(255) NOT NULL, "created_at" DATETIME, '
+        '"attempt_score" INTEGER NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE, '
+        'FOREIGN KEY ("entry_id") REFERENCES "dictionaryentry" ("id") ON DELETE SET NULL)',
+        'CREATE INDEX "exerciselog_user_id" ON "exerciselog" ("user_id")',
+        'CREATE INDEX "exerciselog_entry_id" ON "exerciselog" ("entry_id")',
+    ],
+    # Before the columns init_database used to patch in on every boot.
+    "unpatched": [
+        'CREATE TABLE "user" ("id" INTEGER NOT NULL PRIMARY KEY, "username" VARCHAR(255) NOT NULL, '
+        '"password_hash" VARCHAR(255) NOT NULL)',
+        'CREATE UNIQUE INDEX "user_username" ON "user" ("username")',
+        'CREATE TABLE "dictionaryentry" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL, '
+        '"text" TEXT NOT NULL, "translation" TEXT, "notes" TEXT, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE)',
+        'CREATE INDEX "dictionaryentry_user_id" ON "dictionaryentry" ("user_id")',
+        'CREATE TABLE "exerciselog" ("id" INTEGER NOT NULL PRIMARY KEY, "user_id" INTEGER NOT NULL, '
+        '"kind" VARCHAR(255) NOT NULL, "created_at" DATETIME, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE)',
+        'CREATE INDEX "exerciselog_user_id" ON "exerciselog" ("user_id")',
+    ],
+}
+
+_SAMPLE_NOTES = json.dumps({"examples": [{"danish": "Hunden sover.", "english": "The dog is sleeping."}]})
+
+
+def _seed(legacy: str) -> None:
+    database.execute_sql('INSERT INTO "user" ("username", "password_hash") VALUES (?, ?)', ("legacy", "x"))
+    if legacy == "pre_migrations":
+        database.execute_sql(
+            'INSERT INTO "dictionaryentry" ("user_id", "text", "translation", "notes", "is_external_input", '
+            '"created_at", "probability_score") VALUES (1, ?, ?, ?, 1, CURRENT_TIMESTAMP, 0.8)',
+            ("hund", "dog", _SAMPLE_NOTES),
+        )
+        database.execute_sql(
+            'INSERT INTO "exerciselog" ("user_id", "entry_id", "kind", "created_at", "attempt_score") '
+            "VALUES (1, 1, 'practice', CURRENT_TIMESTAMP, 3)"
+        )
+    else:
+        database.execute_sql(
+            'INSERT INTO "dictionaryentry" ("user_id", "text", "translation", "notes") VALUES (1, ?, ?, ?)',
+            ("hund", "dog", _SAMPLE_NOTES),
+        )
+        database.execute_sql(
+            'INSERT INTO "exerciselog" ("user_id", "kind", "created_at") VALUES (1, \'practice\', CURRENT_TIMESTAMP)'
+        )
+
+
+def _schema() -> dict:
+    """Column names and (columns, unique) per index for every table except the migrations table."""
+    schema = {}
+    for table in database.get_tables():
+        if table == migrations.MIGRATIONS_TABLE:
+            continue
+        schema[table] = {
+            "columns": migrations.columns(database, table),
+            "indexes": {index.name: (tuple(index.columns), index.unique) for index in database.get_indexes(table)},
+        }
+    return schema
+
+
+def _build(path: Path, legacy: str | None = None) -> dict:
+    database.init(str(path))
+    with database.connection_context():
+        if legacy is not None:
+            for statement in LEGACY_SCHEMAS[legacy]:
+                database.execute_sql(statement)
+            _seed(legacy)
+        migrations.migrate()
+        return _schema()
+
+
+def _differences(expected: dict, actual: dict) -> list:
+    problems = []
+    for table in sorted(expected.keys() | actual.keys()):
+        if table not in actual:
+            problems.append(f"missing table {table}")
+            continue
+        if table not in expected:
+            problems.append(f"unexpected table {table}")
+            continue
+        for column in sorted(expected[table]["columns"] - actual[table]["columns"]):
+            problems.append(f"missing column {table}.{column}")
+        for column in sorted(actual[table]["columns"] - expected[table]["columns"]):
+            problems.append(f"unexpected column {table}.{column}")
+        want, got = expected[table]["indexes"], actual[table]["indexes"]
+        for name in sorted(want.keys() | got.keys()):
+            if want.get(name) != got.get(name):
+                problems.append(f"index {name}: expected {want.get(name)}, got {got.get(name)}")
+    return problems
+
+
+def _model_drift(schema: dict) -> list:
+    """Model fields with no column in the migrated schema, i.e. a column nobody migrates in."""
+    problems = []
+    for model in Base.__subclasses__():
+        table = model._meta.table_name
+        if table not in schema:
+            problems.append(f"model {model.__name__}: no table {table}")
+            continue
+        for field in model._meta.sorted_fields:
+            if field.column_name not in schema[table]["columns"]:
+                problems.append(f"model {model.__name__}: no column {table}.{field.column_name}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fresh = _build(Path(temp_dir) / "fresh.db")
+        problems = _model_drift(fresh)
+        print(f"{'FAIL' if problems else 'ok':4}  fresh: {', '.join(problems) if problems else 'matches the models'}")
+        failed = bool(problems)
+
+        for legacy in LEGACY_SCHEMAS:
+            try:
+                problems = _differences(fresh, _build(Path(temp_dir) / f"{legacy}.db", legacy))
+            except Exception as exc:
+                problems = [f"migration failed: {exc!r}"]
+            status = "FAIL" if problems else "ok"
+            print(f"{status:4}  {legacy}: {', '.join(problems) if problems else 'matches a fresh database'}")
+            failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Run EXPLAIN on the app's hot queries and fail if any of them needs a sequential scan or misses its index."""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/explain_hot_queries.py --fresh
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+
+env_path = PROJECT_ROOT / ".env"
+if env_path.exists():
+    load_dotenv(env_path)
+else:
+    load_dotenv()
+
+
+def hot_queries(user_id: int, entry_id: int) -> dict:
+    """
+    The access paths served on every request (keep in step with server.py and
+    attempt_stats.backfill), each with the indexes it is expected to use.
+    """
+    from peewee import fn
+
+    from source import DailyExerciseTotal, DictionaryEntry, EntryExample, EntryTombstone, ExerciseLog
+
+    start_date = date.today() - timedelta(days=6)
+    created_day = fn.DATE(DictionaryEntry.created_at)
+    return {
+        "attempt_stats_backfill": (
+            ExerciseLog.select(fn.COUNT(ExerciseLog.id), fn.SUM(ExerciseLog.attempt_score)).where(
+                (ExerciseLog.user == user_id) & (ExerciseLog.entry == entry_id)
+            ),
+            ("exerciselog_user_id_entry_id",),
+        ),
+        "list_entries": (
+            DictionaryEntry.select()
+            .where(DictionaryEntry.user == user_id)
+            .order_by(DictionaryEntry.id.desc()),
+            # SQLite appends the rowid to every index, so the single-column one is ordered by id too.
+            ("dictionaryentry_user_id_id", "dictionaryentry_user_id"),
+        ),
+        "list_entries_page": (
+            DictionaryEntry.select()
+            .where((DictionaryEntry.user == user_id) & (DictionaryEntry.id < entry_id + 100))
+            .order_by(DictionaryEntry.id.desc())
+            .limit(50),
+            ("dictionaryentry_user_id_id", "dictionaryentry_user_id"),
+        ),
+        "list_entries_examples": (
+            EntryExample.select()
+            .where(EntryExample.entry.in_([entry_id]))
+            .order_by(EntryExample.entry, EntryExample.id),
+            ("entryexample_entry_id_id", "entryexample_entry_id"),
+        ),
+        "sync_entries": (
+            DictionaryEntry.select()
+            .where((DictionaryEntry.user == user_id) & (DictionaryEntry.change_seq > 0))
+            .order_by(DictionaryEntry.change_seq)
+            .limit(501),
+            ("dictionaryentry_user_id_change_seq",),
+        ),
+        "sync_tombstones": (
+            EntryTombstone.select()
+            .where((EntryTombstone.user == user_id) & (EntryTombstone.change_seq > 0))
+            .order_by(EntryTombstone.change_seq)
+            .limit(501),
+            ("entrytombstone_user_id_change_seq",),
+        ),
+        "daily_word_counts": (
+            DictionaryEntry.select(created_day, fn.COUNT(DictionaryEntry.id))
+            .where(
+                (DictionaryEntry.user == user_id)
+                & DictionaryEntry.created_at.is_null(False)
+                & (DictionaryEntry.created_at >= start_date)
+            )
+            .group_by(created_day)
+            .order_by(created_day),
+            ("dictionaryentry_user_id_created_at",),
+        ),
+        "daily_exercise_totals": (
+            DailyExerciseTotal.select(DailyExerciseTotal.day, fn.SUM(DailyExerciseTotal.count))
+            .where((DailyExerciseTotal.user == user_id) & (DailyExerciseTotal.day >= start_date))
+            .group_by(DailyExerciseTotal.day),
+            ("dailyexercisetotal_user_id_day",),
+        ),
+    }
+
+
+def _sqlite_plan(database, query) -> list:
+    sql, params = query.sql()
+    rows = database.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _sqlite_seq_scans(plan: list) -> list:
+    # "SCAN <table>" without an index is a full table scan; "SEARCH ... USING INDEX" is not.
+    return [line for line in plan if line.startswith("SCAN ") and "USING" not in line and "SUBQUERY" not in line]
+
+
+def _postgres_plan(database, query) -> dict:
+    sql, params = query.sql()
+    return database.execute_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).fetchone()[0][0]["Plan"]
+
+
+def _postgres_seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(f"Seq Scan on {plan.get('Relation Name')}")
+    for child in plan.get("Plans", []):
+        found.extend(_postgres_seq_scans(child))
+    return found
+
+
+def _postgres_indexes(plan: dict) -> list:
+    found = [plan["Index Name"]] if plan.get("Index Name") else []
+    for child in plan.get("Plans", []):
+        found.extend(_postgres_indexes(child))
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Check a temporary SQLite database built by the migrations instead of the configured one.",
+    )
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--entry-id", type=int, default=1)
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.fresh:
+        temp_dir = tempfile.TemporaryDirectory()
+        os.environ.pop("DATABASE_URL", None)
+        os.environ["SQLITE_PATH"] = str(Path(temp_dir.name) / "explain.db")
+
+    from source import migrations
+    from source.database import database
+
+    failed = False
+    with database.connection_context():
+        if args.fresh:
+            migrations.migrate()
+        postgres = migrations.is_postgres(database)
+        if postgres:
+            # Tiny tables make a seq scan the cheapest plan; forbid it so only a missing index shows one.
+            database.execute_sql("SET enable_seqscan = off")
+
+        for name, (query, expected) in hot_queries(args.user_id, args.entry_id).items():
+            if postgres:
+                plan = _postgres_plan(database, query)
+                problems = _postgres_seq_scans(plan)
+                used = _postgres_indexes(plan)
+                summary = f"{plan.get('Node Type', '')} using {', '.join(used) or 'no index'}"
+            else:
+                plan = _sqlite_plan(database, query)
+                problems = _sqlite_seq_scans(plan)
+                used = [index for index in expected if any(f"INDEX {index} " in line for line in plan)]
+                summary = "; ".join(plan)
+            if not any(index in used for index in expected):
+                problems.append(f"expected index {' or '.join(expected)}")
+            status = "FAIL" if problems else "ok"
+            print(f"{status:4}  {name}: {', '.join(problems) if problems else summary}")
+            failed = failed or bool(problems)
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
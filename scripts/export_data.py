@@ -23,6 +23,7 @@ from source.user import User  # noqa: E402
 from source.dictionary_entry import DictionaryEntry  # noqa: E402
 from source.daily_exercise_total import DailyExerciseTotal  # noqa: E402
 from source.database import database  # noqa: E402
+from source.entry_examples import load_examples_for_entries  # noqa: E402
 
 
 def export() -> dict:
@@ -41,6 +42,9 @@ def export() -> dict:
     except Exception:
         daily_totals = []
 
+    entries = list(DictionaryEntry.select().order_by(DictionaryEntry.id))
+    examples = load_examples_for_entries([entry.id for entry in entries])
+
     data = {
         "users": [
             {
@@ -57,12 +61,15 @@ def export() -> dict:
                 "text": entry.text,
                 "translation": entry.translation,
                 "notes": entry.notes,
+                "examples": [
+                    {"danish": example["danish"], "english": example["english"]} for example in examples[entry.id]
+                ],
                 "is_external_input": bool(getattr(entry, "is_external_input", True)),
                 "created_at": (
                     entry.created_at.isoformat() if getattr(entry, "created_at", None) else None
                 ),
             }
-            for entry in DictionaryEntry.select().order_by(DictionaryEntry.id)
+            for entry in entries
         ],
         "daily_exercise_totals": daily_totals,
     }
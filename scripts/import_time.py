@@ -0,0 +1,72 @@
+"""Profile how long a cold worker takes to import the app, using `python -X importtime`."""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/import_time.py --top 15 --budget-ms 400
+
+# SDKs that must only load on first use, never while a worker boots.
+LAZY_MODULES = ("openai", "google.cloud.translate_v2", "google.cloud.texttospeech", "google.oauth2", "numpy")
+
+
+def profile(module: str) -> list:
+    """Return [(cumulative_us, self_us, name)] for every module imported by `import module`."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Importing {module} failed.")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not self_us.isdigit():
+            continue
+        rows.append((int(cumulative_us), int(self_us), name))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="server", help="Module to import (default: server).")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports by cumulative time.")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero if the import takes longer than this.")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the numbers reflect a recycled worker, not a first deploy.
+    profile(args.module)
+    rows = profile(args.module)
+
+    total_ms = next((cumulative for cumulative, _, name in rows if name == args.module), 0) / 1000.0
+    print(f"import {args.module}: {total_ms:.1f} ms ({len(rows)} modules)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[: args.top]:
+        print(f"{cumulative / 1000.0:>14.1f} {self_us / 1000.0:>9.1f}  {name}")
+
+    failed = False
+    loaded = {name for _, _, name in rows}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        print(f"FAIL: imported at boot but should load lazily: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
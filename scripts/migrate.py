@@ -0,0 +1,47 @@
+"""Apply pending database schema migrations, or report the schema version with --status."""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/migrate.py --status
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+
+env_path = PROJECT_ROOT / ".env"
+if env_path.exists():
+    load_dotenv(env_path)
+else:
+    load_dotenv()
+
+from source import migrations  # noqa: E402
+from source.database import database  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--status", action="store_true", help="Show the current version and pending migrations.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with database.connection_context():
+        version = migrations.current_version()
+        pending = migrations.pending()
+        print(f"schema version {version}, latest {migrations.latest_version()}")
+        if args.status:
+            for number, name in pending:
+                print(f"  pending {number:04d}_{name}")
+            return 1 if pending else 0
+
+        applied = migrations.migrate()
+        print(f"applied {len(applied)} migration(s); schema version {migrations.current_version()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Bulk-synthesize pronunciation audio for every entry and stored example into the audio store."""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+#python scripts/warm_audio.py --workers 4 --state audio_warmup.json
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+
+env_path = PROJECT_ROOT / ".env"
+if env_path.exists():
+    load_dotenv(env_path)
+else:
+    load_dotenv()
+
+from source import pronunciation  # noqa: E402
+from source.database import database  # noqa: E402
+from source.dictionary_entry import DictionaryEntry  # noqa: E402
+from source.entry_examples import load_examples_for_entries  # noqa: E402
+
+
+def entry_texts(entry: DictionaryEntry, examples: list) -> list:
+    texts = [(entry.translation or "").strip()]
+    texts.extend((example.get("danish") or "").strip() for example in examples)
+    return [text for text in texts if text]
+
+
+def load_checkpoint(path: Path) -> int:
+    if not path.exists():
+        return 0
+    try:
+        return int(json.loads(path.read_text()).get("last_entry_id") or 0)
+    except (ValueError, AttributeError):
+        return 0
+
+
+def save_checkpoint(path: Path, last_entry_id: int) -> None:
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps({"last_entry_id": last_entry_id}))
+    temp_path.replace(path)
+
+
+def warm(workers: int, batch_size: int, state_path: Path | None, user_id: int | None, limit: int | None) -> dict:
+    start_after = load_checkpoint(state_path) if state_path else 0
+    totals = {"entries": 0, "cached": 0, "synthesized": 0, "failed": 0}
+    started = time.monotonic()
+
+    def _warm_one(text: str) -> str:
+        if pronunciation.cached_path(pronunciation.audio_key(text)) is not None:
+            return "cached"
+        try:
+            pronunciation.ensure(text)
+        except Exception as exc:
+            print(f"  failed: {text[:60]!r}: {exc}", file=sys.stderr)
+            return "failed"
+        return "synthesized"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        last_id = start_after
+        while limit is None or totals["entries"] < limit:
+            query = DictionaryEntry.select().where(DictionaryEntry.id > last_id)
+            if user_id is not None:
+                query = query.where(DictionaryEntry.user == user_id)
+            size = batch_size if limit is None else min(batch_size, limit - totals["entries"])
+            entries = list(query.order_by(DictionaryEntry.id).limit(size))
+            if not entries:
+                break
+
+            examples = load_examples_for_entries([entry.id for entry in entries])
+            texts = list(dict.fromkeys(text for entry in entries for text in entry_texts(entry, examples[entry.id])))
+            for outcome in executor.map(_warm_one, texts):
+                totals[outcome] += 1
+            totals["entries"] += len(entries)
+            last_id = entries[-1].id
+
+            # Only checkpoint whole batches, so a resumed run never skips unfinished entries.
+            if state_path:
+                save_checkpoint(state_path, last_id)
+            elapsed = time.monotonic() - started
+            print(
+                f"up to entry {last_id}: {totals['entries']} entries, {totals['synthesized']} synthesized, "
+                f"{totals['cached']} cached, {totals['failed']} failed ({elapsed:.1f}s)"
+            )
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Text-to-Speech calls (default: 4).")
+    parser.add_argument("--batch-size", type=int, default=100, help="Entries per checkpoint (default: 100).")
+    parser.add_argument("--state", type=Path, help="Checkpoint file; a rerun resumes after the last finished batch.")
+    parser.add_argument("--reset", action="store_true", help="Ignore and overwrite an existing checkpoint.")
+    parser.add_argument("--user-id", type=int, help="Only warm entries belonging to this user.")
+    parser.add_argument("--limit", type=int, help="Stop after this many entries.")
+    args = parser.parse_args()
+
+    if args.reset and args.state and args.state.exists():
+        args.state.unlink()
+
+    with database.connection_context():
+        totals = warm(args.workers, args.batch_size, args.state, args.user_id, args.limit)
+    print(json.dumps(totals))
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,14 +8,47 @@ import re
 from datetime import UTC, datetime, timedelta
 
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, jsonify, session, g, make_response, send_from_directory
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    session,
+    g,
+    make_response,
+    redirect,
+    send_file,
+    send_from_directory,
+    stream_with_context,
+    url_for,
+)
 from peewee import fn
 from werkzeug.security import check_password_hash, generate_password_hash
-from google.cloud import texttospeech
 
 load_dotenv()
 
-from source import DailyExerciseTotal, DictionaryEntry, ExerciseLog, User, database, llm_actions
+from source import (
+    BufferedExample,
+    DailyExerciseTotal,
+    DictionaryEntry,
+    DistractorSet,
+    EntryExample,
+    User,
+    attempt_stats,
+    concurrency,
+    database,
+    distractor_stock,
+    entry_examples,
+    example_buffer,
+    llm_actions,
+    metrics,
+    migrations,
+    practice_sampler,
+    probability,
+    pronunciation,
+    sync,
+)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
@@ -23,129 +56,21 @@ app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
 app.config["SESSION_PERMANENT"] = True
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=365)
 
-tts_client = None
-
-
-def _get_tts_client():
-    global tts_client
-    if tts_client is None:
-        tts_client = texttospeech.TextToSpeechClient()
-    return tts_client
-
-
 def init_database():
     if database.is_closed():
         database.connect()
-    database.create_tables([User], safe=True)
-
-    table_name = DictionaryEntry._meta.table_name
-    if database.table_exists(table_name):
-        existing_columns = {column.name for column in database.get_columns(table_name)}
-        if "user_id" not in existing_columns:
-            database.drop_tables([DictionaryEntry], safe=True)
-        if "is_external_input" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "is_external_input" INTEGER NOT NULL DEFAULT 1'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "is_external_input" BOOLEAN NOT NULL DEFAULT TRUE'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add is_external_input column automatically.")
-        if "created_at" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "created_at" TIMESTAMP'
-                    )
-                    database.execute_sql(
-                        f'UPDATE "{table_name}" SET "created_at" = CURRENT_TIMESTAMP WHERE "created_at" IS NULL'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "created_at" TIMESTAMP DEFAULT CURRENT_TIMESTAMP'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add created_at column automatically.")
-        if "last_seen_at" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "last_seen_at" TIMESTAMP'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "last_seen_at" TIMESTAMP'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add last_seen_at column automatically.")
-        if "probability_score" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "probability_score" REAL NOT NULL DEFAULT 0.8'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{table_name}" ADD COLUMN "probability_score" DOUBLE PRECISION NOT NULL DEFAULT 0.8'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add probability_score column automatically.")
-
-    database.create_tables([DictionaryEntry], safe=True)
-    database.create_tables([DailyExerciseTotal], safe=True)
-    database.create_tables([ExerciseLog], safe=True)
-    try:
-        DictionaryEntry.update(probability_score=0.8).where(
-            (DictionaryEntry.probability_score.is_null(True))
-            | (DictionaryEntry.probability_score <= 0)
-        ).execute()
-    except Exception:
-        app.logger.exception("Unable to normalize probability_score defaults.")
-
-    log_table_name = ExerciseLog._meta.table_name
-    if database.table_exists(log_table_name):
-        existing_columns = {column.name for column in database.get_columns(log_table_name)}
-        if "attempt_score" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{log_table_name}" ADD COLUMN "attempt_score" INTEGER NOT NULL DEFAULT 1'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{log_table_name}" ADD COLUMN "attempt_score" INTEGER NOT NULL DEFAULT 1'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add attempt_score column automatically.")
-        if "entry_id" not in existing_columns:
-            try:
-                if database.__class__.__name__ == "SqliteDatabase":
-                    database.execute_sql(
-                        f'ALTER TABLE "{log_table_name}" ADD COLUMN "entry_id" INTEGER'
-                    )
-                else:
-                    database.execute_sql(
-                        f'ALTER TABLE "{log_table_name}" ADD COLUMN "entry_id" INTEGER'
-                    )
-            except Exception:
-                app.logger.exception("Unable to add entry_id column automatically.")
+    # Only checks the recorded schema version unless AUTO_MIGRATE applies pending migrations.
+    migrations.ensure_current()
 
 
 @app.teardown_appcontext
 def close_database(_exc):
+    # With Postgres this returns the connection to the pool rather than disconnecting.
     if not database.is_closed():
         database.close()
 
 init_database()
-
-
-def _load_example_from_notes(entry: DictionaryEntry):
-    examples = _load_examples_from_notes(entry.notes)
-    return examples[0] if examples else None
+probability.start_scheduler()
 
 
 def _to_iso_date(value):
@@ -159,168 +84,35 @@ def _to_iso_date(value):
         return str(value)
 
 
-def _clamp(value: float, low: float, high: float) -> float:
-    return max(low, min(high, value))
-
-
 def _utc_now() -> datetime:
     return datetime.now(UTC)
 
 
-def _as_utc(value: datetime | None) -> datetime | None:
-    if value is None:
-        return None
-    if value.tzinfo is None:
-        return value.replace(tzinfo=UTC)
-    return value.astimezone(UTC)
-
-
 def _recompute_entry_probability(entry: DictionaryEntry) -> float:
-    now = _utc_now()
-    avg_attempt_score = (
-        ExerciseLog.select(fn.AVG(ExerciseLog.attempt_score))
-        .where(
-            (ExerciseLog.user == entry.user)
-            & (ExerciseLog.entry == entry)
-        )
-        .scalar()
-    )
-
-    avg_attempt_score = float(avg_attempt_score) if avg_attempt_score is not None else 2.0
-    avg_attempt_score = _clamp(avg_attempt_score, 1.0, 4.0)
-
-    # Reverse average score so higher/worse attempts increase selection probability.
-    difficulty = (avg_attempt_score - 1.0) / 3.0
-
-    last_seen_at = _as_utc(getattr(entry, "last_seen_at", None))
-    if last_seen_at:
-        seen_gap_days = max((now - last_seen_at).total_seconds() / 86400.0, 0.0)
-        recency_boost = _clamp(seen_gap_days / 14.0, 0.0, 1.0)
-    else:
-        recency_boost = 1.0
-
-    created_at = _as_utc(getattr(entry, "created_at", None))
-    if created_at:
-        age_days = max((now - created_at).total_seconds() / 86400.0, 0.0)
-        newness_boost = 1.0 - _clamp(age_days / 30.0, 0.0, 1.0)
-    else:
-        newness_boost = 1.0
-
-    # Keep current probabilities relatively high while still ranking by performance/recency/newness.
-    probability = 0.55 + (0.25 * difficulty) + (0.10 * recency_boost) + (0.10 * newness_boost)
-    probability = _clamp(probability, 0.15, 0.99)
-
-    entry.probability_score = round(float(probability), 4)
-    entry.save()
+    entry.probability_score = probability.score(entry, _utc_now())
+    entry.save(only=[DictionaryEntry.probability_score])
+    sync.touch(entry)
     return entry.probability_score
 
 
-def _load_examples_from_notes(notes: str):
-    try:
-        data = json.loads(notes or "")
-        if isinstance(data, dict):
-            if isinstance(data.get("examples"), list):
-                examples = []
-                for item in data["examples"]:
-                    if not isinstance(item, dict):
-                        continue
-                    danish = (item.get("danish") or item.get("example_da") or "").strip()
-                    english = (item.get("english") or item.get("example_en") or "").strip()
-                    if danish or english:
-                        examples.append({"danish": danish, "english": english})
-                if examples:
-                    return _dedup_examples(examples)
-            danish = (data.get("example_da") or data.get("danish") or "").strip()
-            english = (data.get("example_en") or data.get("english") or "").strip()
-            if danish or english:
-                return _dedup_examples([{"danish": danish, "english": english}])
-    except Exception:
-        return []
-    return []
-
-
-def _save_example_to_notes(entry: DictionaryEntry, danish: str, english: str, append: bool = False, max_examples: int | None = None):
-    current = [] if not append else _load_examples_from_notes(entry.notes)
-    example = {"danish": danish or "", "english": english or ""}
-    current.append(example)
-
-    # Deduplicate to keep examples distinct
-    unique_examples = _dedup_examples(current)
-
-    if isinstance(max_examples, int) and max_examples > 0:
-        unique_examples = unique_examples[-max_examples:]
-
-    entry.notes = json.dumps({"examples": unique_examples})
-    entry.save()
-
-
-def _dedup_examples(examples):
-    seen = set()
-    unique = []
-    for item in examples:
-        danish_key = (item.get("danish") or "").strip().lower()
-        english_key = (item.get("english") or "").strip().lower()
-        key = (danish_key, english_key)
-        if key in seen:
-            continue
-        seen.add(key)
-        unique.append(item)
-    return unique
-
-
-def _normalize_example_text(text: str) -> str:
-    return re.sub(r"\s+", " ", (text or "").strip().lower())
-
-
-def _is_duplicate_example(existing_examples, candidate) -> bool:
-    if not candidate:
-        return False
-    cand_da = _normalize_example_text(candidate.get("danish") or "")
-    cand_en = _normalize_example_text(candidate.get("english") or "")
-    for ex in existing_examples or []:
-        if (
-            cand_da
-            and cand_da == _normalize_example_text(ex.get("danish") or "")
-        ) or (
-            cand_en
-            and cand_en == _normalize_example_text(ex.get("english") or "")
-        ):
-            return True
-    return False
-
-
-def _generate_unique_example(entry: DictionaryEntry, max_attempts: int = 3, require_unique: bool = True):
-    existing = _load_examples_from_notes(entry.notes)
-    avoid = [ex.get("danish") or "" for ex in existing if ex.get("danish")]
-
-    for attempt in range(max_attempts):
-        example = None
-        try:
-            example = llm_actions.generate_usage_example_pair(
-                entry.text or "",
-                entry.translation or "",
-                avoid_examples=avoid,
-            )
-        except Exception:
-            example = None
-
-        if not example:
-            continue
-
-        if not _is_duplicate_example(existing, example):
-            return example
-
-        avoid.append(example.get("danish") or "")
-
-    return None if require_unique else (example if example else None)
-
 @app.before_request
 def load_logged_in_user():
     user_id = session.get("user_id")
     if user_id is None:
         g.user = None
-        return
-    g.user = User.get_or_none(User.id == user_id)
+    else:
+        g.user = User.get_or_none(User.id == user_id)
+    # Queue AI calls per user so one user's burst cannot starve everyone else.
+    concurrency.current_user.set(
+        f"user:{g.user.id}" if g.user is not None else f"anonymous:{request.remote_addr}"
+    )
+
+
+def _overloaded_response():
+    response = jsonify({"error": "The AI service is busy right now. Please try again shortly."})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
 
 
 def login_required(view):
@@ -346,10 +138,17 @@ def entry_pronunciation(entry_id: int):
 
     if kind == "example":
         danish_text = ""
+        example_id_raw = request.args.get("example_id")
         index_raw = request.args.get("index")
-        examples = _load_examples_from_notes(entry.notes)
+        examples = entry_examples.load_examples(entry)
         if examples:
-            if index_raw is not None:
+            if example_id_raw is not None:
+                for example in examples:
+                    if str(example["id"]) == example_id_raw.strip():
+                        danish_text = (example.get("danish") or "").strip()
+                        break
+            elif index_raw is not None:
+                # Positional lookup kept for clients cached before examples had ids.
                 try:
                     idx = int(index_raw)
                     if 0 <= idx < len(examples):
@@ -367,29 +166,43 @@ def entry_pronunciation(entry_id: int):
         return jsonify({"error": "No Danish text available for this entry."}), 400
 
     try:
-        synthesis_input = texttospeech.SynthesisInput(text=danish_text)
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="da-DK",
-            ssml_gender=texttospeech.SsmlVoiceGender.FEMALE,
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
-        )
-        response = _get_tts_client().synthesize_speech(
-            input=synthesis_input,
-            voice=voice,
-            audio_config=audio_config,
-        )
-        audio_content = response.audio_content
-        flask_response = make_response(audio_content)
-        flask_response.headers["Content-Type"] = "audio/mpeg"
-        flask_response.headers["Content-Length"] = str(len(audio_content))
-        flask_response.headers["Cache-Control"] = "no-store"
-        return flask_response
+        key = pronunciation.ensure(danish_text)
     except Exception:
         app.logger.exception("Failed to synthesize speech for entry %s", entry_id)
         return jsonify({"error": "Pronunciation is unavailable right now."}), 502
 
+    # The audio itself lives at its immutable content address, which clients can cache and reuse.
+    response = redirect(url_for("cached_audio", key=key))
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.route("/audio/<key>.mp3", methods=["GET"])
+@login_required
+def cached_audio(key: str):
+    """Serve stored audio by content address; the bytes behind a key never change."""
+    try:
+        response = _send_audio(key, "private, max-age=31536000, immutable")
+    except ValueError:
+        response = None
+    if response is None:
+        return jsonify({"error": "Audio not found."}), 404
+    return response
+
+
+def _send_audio(key: str, cache_control: str):
+    path = pronunciation.cached_path(key)
+    if path is None:
+        return None
+    try:
+        # Handles If-None-Match (304) and Range (206) against the strong ETag.
+        response = send_file(path, mimetype=pronunciation.MIMETYPE, etag=key, conditional=True)
+    except FileNotFoundError:
+        # Evicted between the lookup and the open.
+        return None
+    response.headers["Cache-Control"] = cache_control
+    return response
+
 
 @app.route("/")
 def home():
@@ -404,6 +217,18 @@ def service_worker():
     return response
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """This worker process's metrics; other gunicorn workers keep their own and are not aggregated."""
+    token = os.environ.get("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return jsonify({"error": "Authentication required."}), 401
+    response = make_response(metrics.render())
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/auth/status", methods=["GET"])
 def auth_status():
     if g.user is None:
@@ -471,12 +296,50 @@ def translate():
             translation = llm_actions.get_translation(content)
         else:
             return jsonify({"error": "Unsupported translation direction."}), 400
-    except Exception:
+    except Exception as exc:
+        if concurrency.is_queue_timeout(exc):
+            return _overloaded_response()
         app.logger.exception("Translation failed for direction %s", direction)
         return jsonify({"error": "Translation service unavailable."}), 502
 
     return jsonify({"translation": translation})
 
+
+MAX_BATCH_TRANSLATIONS = 500
+
+
+@app.route("/translate/batch", methods=["POST"])
+def translate_batch():
+    data = request.get_json() or {}
+    texts = data.get("texts")
+    direction = (data.get("direction") or "en-da").lower()
+
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "texts must be a list of strings."}), 400
+    if len(texts) > MAX_BATCH_TRANSLATIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_TRANSLATIONS} texts can be translated at once."}), 400
+
+    target_language = {"en-da": "da", "da-en": "en"}.get(direction)
+    if target_language is None:
+        return jsonify({"error": "Unsupported translation direction."}), 400
+
+    try:
+        translations = llm_actions.translate_google_batch(texts, target_language)
+    except Exception as exc:
+        if concurrency.is_queue_timeout(exc):
+            return _overloaded_response()
+        app.logger.exception("Batch translation failed for direction %s", direction)
+        return jsonify({"error": "Translation service unavailable."}), 502
+
+    return jsonify(
+        {
+            "translations": [
+                {"text": text, "translation": translation}
+                for text, translation in zip(texts, translations)
+            ]
+        }
+    )
+
 @app.route("/save", methods=["POST"])
 @login_required
 def add_entry():
@@ -502,48 +365,143 @@ def add_entry():
         notes=notes,
         is_external_input=is_external_input,
     )
+    sync.touch(dictionary_entry)
+    distractor_stock.schedule_fill(dictionary_entry.id)
+    pronunciation.schedule([danish_text])
 
     return jsonify({"status": "success", "message": "Entry saved successfully"})
 
 
+MAX_ENTRIES_PAGE_SIZE = 500
+
+# Field name -> (columns it needs, value from the entry and its examples).
+_ENTRY_FIELDS = {
+    "id": ((), lambda entry, examples: entry.id),
+    "text": ((DictionaryEntry.text,), lambda entry, examples: entry.text),
+    "translation": ((DictionaryEntry.translation,), lambda entry, examples: entry.translation),
+    "created_at": (
+        (DictionaryEntry.created_at,),
+        lambda entry, examples: entry.created_at.isoformat() if entry.created_at else None,
+    ),
+    "notes": ((DictionaryEntry.notes,), lambda entry, examples: entry.notes),
+    "is_external_input": (
+        (DictionaryEntry.is_external_input,),
+        lambda entry, examples: bool(entry.is_external_input),
+    ),
+    "exercise_count": ((DictionaryEntry.attempt_count,), lambda entry, examples: int(entry.attempt_count or 0)),
+    "probability_score": (
+        (DictionaryEntry.probability_score,),
+        lambda entry, examples: float(entry.probability_score or 0.8),
+    ),
+    "example": ((), lambda entry, examples: (examples or [None])[0]),
+    "examples": ((), lambda entry, examples: examples),
+}
+
+
+def _requested_fields():
+    """The entry keys named by the `fields` query parameter (all by default), and any unknown ones."""
+    fields_raw = (request.args.get("fields") or "").strip()
+    fields = list(dict.fromkeys(f.strip() for f in fields_raw.split(",") if f.strip())) or list(_ENTRY_FIELDS)
+    return fields, [field for field in fields if field not in _ENTRY_FIELDS]
+
+
 @app.route("/entries", methods=["GET"])
 @login_required
 def list_entries():
-    exercise_counts = {
-        item.entry_id: item.exercise_count
-        for item in (
-            ExerciseLog.select(
-                ExerciseLog.entry,
-                fn.COUNT(ExerciseLog.id).alias("exercise_count"),
-            )
-            .where(
-                (ExerciseLog.user == g.user)
-                & ExerciseLog.entry.is_null(False)
-            )
-            .group_by(ExerciseLog.entry)
-        )
-    }
+    """
+    The user's entries, newest first. With `limit` the list is paged by id:
+    pass the returned `next_cursor` as `cursor` for the following page.
+    `fields` is a comma-separated subset of the entry keys to return.
+    """
+    fields, unknown = _requested_fields()
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}."}), 400
+
+    try:
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+        cursor = int(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers."}), 400
+    if limit is not None and not 1 <= limit <= MAX_ENTRIES_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_ENTRIES_PAGE_SIZE}."}), 400
+
+    owned = DictionaryEntry.user == g.user
+    columns = {"id": DictionaryEntry.id}
+    for field in fields:
+        for column in _ENTRY_FIELDS[field][0]:
+            columns.setdefault(column.name, column)
+
+    query = DictionaryEntry.select(*columns.values()).where(owned)
+    if cursor is not None:
+        query = query.where(DictionaryEntry.id < cursor)
+    query = query.order_by(DictionaryEntry.id.desc())
+    if limit is not None:
+        # One extra row tells us whether another page follows.
+        query = query.limit(limit + 1)
+    rows = list(query)
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    examples_by_entry = {}
+    if "example" in fields or "examples" in fields:
+        examples_by_entry = entry_examples.load_examples_for_entries([entry.id for entry in rows])
 
     entries = [
-        {
-            "id": entry.id,
-            "text": entry.text,
-            "translation": entry.translation,
-            "created_at": entry.created_at.isoformat() if getattr(entry, "created_at", None) else None,
-            "notes": entry.notes,
-            "is_external_input": bool(getattr(entry, "is_external_input", True)),
-            "exercise_count": int(exercise_counts.get(entry.id, 0)),
-            "probability_score": float(getattr(entry, "probability_score", 0.8) or 0.8),
-            "example": (_load_examples_from_notes(entry.notes) or [None])[0],
-            "examples": _load_examples_from_notes(entry.notes),
-        }
-        for entry in (
-            DictionaryEntry.select()
-            .where(DictionaryEntry.user == g.user)
-            .order_by(DictionaryEntry.id.desc())
-        )
+        {field: _ENTRY_FIELDS[field][1](entry, examples_by_entry.get(entry.id, [])) for field in fields}
+        for entry in rows
+    ]
+    body = {"entries": entries}
+    if limit is not None:
+        body["next_cursor"] = next_cursor
+
+    response = jsonify(body)
+    response.headers["X-Total-Count"] = str(DictionaryEntry.select().where(owned).count())
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+SYNC_PAGE_SIZE = 500
+
+
+@app.route("/sync", methods=["GET"])
+@login_required
+def sync_changes():
+    """
+    Entries changed and ids deleted since `since`, the `token` from the last
+    call (0 for everything). Keep calling while `has_more` is true. `reset`
+    means the token is from another history and the client must start over.
+    `fields` selects entry keys as on GET /entries.
+    """
+    try:
+        since = int(request.args.get("since") or 0)
+    except ValueError:
+        return jsonify({"error": "since must be an integer token."}), 400
+    fields, unknown = _requested_fields()
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}."}), 400
+
+    reset = since < 0 or since > sync.current_seq(g.user.id)
+    if reset:
+        since = 0
+
+    changed, deleted, token, has_more = sync.changes_since(g.user, since, SYNC_PAGE_SIZE)
+    examples_by_entry = {}
+    if "example" in fields or "examples" in fields:
+        examples_by_entry = entry_examples.load_examples_for_entries([entry.id for entry in changed])
+    entries = [
+        {field: _ENTRY_FIELDS[field][1](entry, examples_by_entry.get(entry.id, [])) for field in fields}
+        for entry in changed
     ]
-    return jsonify({"entries": entries})
+
+    response = jsonify(
+        {"entries": entries, "deleted": deleted, "token": str(token), "has_more": has_more, "reset": reset}
+    )
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 def _daily_counts(model, date_field, days: int):
@@ -682,12 +640,7 @@ def progress_exercise():
     else:
         DailyExerciseTotal.create(user=g.user, day=today, count=1)
 
-    ExerciseLog.create(
-        user=g.user,
-        entry=entry,
-        kind=kind,
-        attempt_score=attempt_score,
-    )
+    attempt_stats.record_attempt(g.user, entry, kind, attempt_score)
 
     probability_score = None
     if entry is not None:
@@ -699,6 +652,37 @@ def progress_exercise():
     return jsonify({"status": "ok", "probability_score": probability_score})
 
 
+@app.route("/practise/next", methods=["GET"])
+@login_required
+def practise_next():
+    """Draw the next entry to practise, weighted by probability_score; `exclude` skips the active one."""
+    try:
+        exclude = int(request.args["exclude"]) if request.args.get("exclude") else None
+    except ValueError:
+        return jsonify({"error": "exclude must be an entry id."}), 400
+
+    # A drawn entry can vanish between the sampler refresh and the read; redraw from a fresh sampler.
+    for _ in range(3):
+        entry_id = practice_sampler.draw(g.user.id, exclude=exclude)
+        if entry_id is None:
+            return jsonify({"error": "No entries available. Add words to practise."}), 404
+        entry = DictionaryEntry.get_or_none(
+            (DictionaryEntry.id == entry_id) & (DictionaryEntry.user == g.user)
+        )
+        if entry is not None:
+            break
+        practice_sampler.forget(g.user.id)
+    else:
+        return jsonify({"error": "No entries available. Add words to practise."}), 404
+
+    examples = entry_examples.load_examples(entry)
+    response = jsonify(
+        {"entry": {field: serialize(entry, examples) for field, (_, serialize) in _ENTRY_FIELDS.items()}}
+    )
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @app.route("/practise/entry-seen", methods=["POST"])
 @login_required
 def practise_entry_seen():
@@ -714,12 +698,16 @@ def practise_entry_seen():
         return jsonify({"error": "Entry not found."}), 404
 
     entry.last_seen_at = _utc_now()
-    entry.save()
+    entry.save(only=[DictionaryEntry.last_seen_at])
     probability_score = _recompute_entry_probability(entry)
 
     return jsonify({"status": "ok", "entry_id": entry.id, "probability_score": probability_score})
 
 
+# save_example stores nothing when the new example paraphrases a stored one.
+_PARAPHRASED_EXAMPLE_ERROR = "The new example was too close to one already saved. Please try again."
+
+
 @app.route("/entries/<int:entry_id>/example", methods=["POST"])
 @login_required
 def entry_example(entry_id: int):
@@ -738,14 +726,16 @@ def entry_example(entry_id: int):
     append = (request.args.get("append") or "").lower() in ("1", "true", "yes", "append")
 
     if not force_refresh and not append:
-        cached = _load_example_from_notes(entry)
-        if cached:
-            return jsonify({"example": cached, "examples": _load_examples_from_notes(entry.notes)})
+        examples = entry_examples.load_examples(entry)
+        if examples:
+            return jsonify({"example": examples[0], "examples": examples})
 
     try:
-        example = _generate_unique_example(entry, require_unique=False)
+        example = entry_examples.generate_unique_example(entry, require_unique=False)
     except ValueError as exc:
         return jsonify({"error": str(exc) or "Unable to generate an example."}), 400
+    except concurrency.QueueTimeout:
+        return _overloaded_response()
     except Exception:
         app.logger.exception("Failed to generate usage example for entry %s", entry_id)
         return jsonify({"error": "Unable to generate an example right now."}), 502
@@ -753,16 +743,87 @@ def entry_example(entry_id: int):
     if not example or not (example.get("danish") or example.get("english")):
         return jsonify({"error": "No example was generated."}), 502
 
-    _save_example_to_notes(
+    stored = entry_examples.save_example(
         entry,
         example.get("danish") or "",
         example.get("english") or "",
         append=append,
     )
+    if stored is None:
+        return jsonify({"error": _PARAPHRASED_EXAMPLE_ERROR}), 409
+
+    examples = entry_examples.load_examples(entry)
+
+    return jsonify({"example": stored, "examples": examples})
+
+
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route("/entries/<int:entry_id>/example/stream", methods=["POST"])
+@login_required
+def entry_example_stream(entry_id: int):
+    """Server-sent-events variant of entry_example that streams tokens as they are generated."""
+    entry = DictionaryEntry.get_or_none(
+        (DictionaryEntry.id == entry_id) & (DictionaryEntry.user == g.user)
+    )
+    if entry is None:
+        return jsonify({"error": "Entry not found."}), 404
+
+    target_text = (entry.text or "").strip()
+    target_translation = (entry.translation or "").strip()
+    if not target_text or not target_translation:
+        return jsonify({"error": "The entry is missing a word or translation."}), 400
+
+    force_refresh = (request.args.get("force") or "").lower() in ("1", "true", "yes", "refresh")
+    append = (request.args.get("append") or "").lower() in ("1", "true", "yes", "append")
+    existing = entry_examples.load_examples(entry)
 
-    examples = _load_examples_from_notes(entry.notes)
+    def generate():
+        if not force_refresh and not append and existing:
+            yield _sse_event("done", {"example": existing[0], "examples": existing})
+            return
 
-    return jsonify({"example": example, "examples": examples})
+        parts = {"danish": [], "english": []}
+        try:
+            for language, delta in llm_actions.stream_usage_example_pair(
+                target_text,
+                target_translation,
+                avoid_examples=[ex.get("danish") or "" for ex in existing],
+            ):
+                parts[language].append(delta)
+                yield _sse_event(language, {"delta": delta})
+        except ValueError as exc:
+            yield _sse_event("error", {"error": str(exc) or "Unable to generate an example."})
+            return
+        except concurrency.QueueTimeout as exc:
+            yield _sse_event("error", {"error": str(exc)})
+            return
+        except Exception:
+            app.logger.exception("Failed to stream usage example for entry %s", entry_id)
+            yield _sse_event("error", {"error": "Unable to generate an example right now."})
+            return
+
+        example = {
+            "danish": "".join(parts["danish"]).strip(),
+            "english": "".join(parts["english"]).strip(),
+        }
+        if not example["danish"]:
+            yield _sse_event("error", {"error": "No example was generated."})
+            return
+
+        stored = entry_examples.save_example(entry, example["danish"], example["english"], append=append)
+        if stored is None:
+            yield _sse_event("error", {"error": _PARAPHRASED_EXAMPLE_ERROR})
+            return
+        yield _sse_event("done", {"example": stored, "examples": entry_examples.load_examples(entry)})
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-store"
+    # Keep reverse proxies from buffering the stream until it completes.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @app.route("/entries/<int:entry_id>", methods=["DELETE"])
@@ -774,28 +835,44 @@ def delete_entry(entry_id: int):
     if entry is None:
         return jsonify({"error": "Entry not found."}), 404
 
-    entry.delete_instance()
+    with database.atomic():
+        # SQLite does not enforce ON DELETE CASCADE here, and it may reuse the id of the newest entry.
+        EntryExample.delete().where(EntryExample.entry == entry.id).execute()
+        DistractorSet.delete().where(DistractorSet.entry == entry.id).execute()
+        BufferedExample.delete().where(BufferedExample.entry == entry.id).execute()
+        sync.delete_entry(entry)
     return jsonify({"status": "success"})
 
 
-@app.route("/entries/<int:entry_id>/examples/<int:example_index>", methods=["DELETE"])
+@app.route("/entries/<int:entry_id>/examples", methods=["GET"])
 @login_required
-def delete_entry_example(entry_id: int, example_index: int):
+def list_entry_examples(entry_id: int):
+    """The entry's stored examples, for clients that list entries without them."""
     entry = DictionaryEntry.get_or_none(
         (DictionaryEntry.id == entry_id) & (DictionaryEntry.user == g.user)
     )
     if entry is None:
         return jsonify({"error": "Entry not found."}), 404
 
-    examples = _load_examples_from_notes(entry.notes)
-    if example_index < 0 or example_index >= len(examples):
-        return jsonify({"error": "Example not found."}), 404
+    response = jsonify({"examples": entry_examples.load_examples(entry)})
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.add_etag()
+    return response.make_conditional(request)
 
-    del examples[example_index]
-    entry.notes = json.dumps({"examples": examples})
-    entry.save()
 
-    return jsonify({"status": "success", "examples": examples})
+@app.route("/entries/<int:entry_id>/examples/<int:example_id>", methods=["DELETE"])
+@login_required
+def delete_entry_example(entry_id: int, example_id: int):
+    entry = DictionaryEntry.get_or_none(
+        (DictionaryEntry.id == entry_id) & (DictionaryEntry.user == g.user)
+    )
+    if entry is None:
+        return jsonify({"error": "Entry not found."}), 404
+
+    if not entry_examples.delete_example(entry, example_id):
+        return jsonify({"error": "Example not found."}), 404
+
+    return jsonify({"status": "success", "examples": entry_examples.load_examples(entry)})
 
 
 @app.route("/practise/ai", methods=["POST"])
@@ -818,12 +895,25 @@ def ai_practise():
         return jsonify({"error": "The selected entry is missing a translation."}), 400
 
     try:
-        ai_set = llm_actions.generate_ai_practise_cards(target_text, target_translation)
-    except ValueError as exc:
-        return jsonify({"error": str(exc) or "Unable to prepare AI practise."}), 502
+        ai_set = distractor_stock.take(entry)
     except Exception:
-        app.logger.exception("Failed to generate AI practise for entry %s", entry_id)
-        return jsonify({"error": "Unable to prepare AI practise."}), 500
+        app.logger.exception("Unable to read distractor stock for entry %s", entry_id)
+        ai_set = None
+
+    # Serve from stock when possible and only generate live on a miss.
+    if ai_set is not None:
+        distractor_stock.schedule_fill(entry.id)
+    else:
+        try:
+            ai_set = llm_actions.generate_ai_practise_cards(target_text, target_translation)
+        except ValueError as exc:
+            return jsonify({"error": str(exc) or "Unable to prepare AI practise."}), 502
+        except concurrency.QueueTimeout:
+            return _overloaded_response()
+        except Exception:
+            app.logger.exception("Failed to generate AI practise for entry %s", entry_id)
+            return jsonify({"error": "Unable to prepare AI practise."}), 500
+        distractor_stock.schedule_fill(entry.id, after_miss=True)
 
     options = [
         {
@@ -900,30 +990,47 @@ def practise_cloze():
     if not target_text or not target_translation:
         return jsonify({"error": "The selected entry is missing a translation."}), 400
 
-    examples = _load_examples_from_notes(entry.notes)
+    examples = entry_examples.load_examples(entry)
 
-    # Always try to generate a fresh, non-repeating example
+    # Serve a prefetched, non-repeating example when one is buffered
     example = None
     try:
-        example = _generate_unique_example(entry, require_unique=True)
+        example = example_buffer.pop(entry, examples)
     except Exception:
-        app.logger.exception("Failed to generate example for cloze practise %s", entry_id)
+        app.logger.exception("Unable to read the example buffer for entry %s", entry_id)
         example = None
 
+    # Otherwise generate a fresh, non-repeating example inline
+    overloaded = False
+    if not example:
+        try:
+            example = entry_examples.generate_unique_example(entry, require_unique=True)
+        except concurrency.QueueTimeout:
+            overloaded = True
+            example = None
+        except Exception:
+            app.logger.exception("Failed to generate example for cloze practise %s", entry_id)
+            example = None
+
     # If generation failed, fall back to any cached example just to keep flow alive
     if not example and examples:
         example = random.choice(examples)
 
-    if example and not _is_duplicate_example(examples, example):
-        examples.append(example)
-        _save_example_to_notes(
+    if example:
+        stored = entry_examples.save_example(
             entry,
             example.get("danish") or "",
             example.get("english") or "",
             append=True,
             max_examples=5,
         )
+        if stored:
+            examples.append(stored)
+
+    example_buffer.schedule_top_up(entry.id)
 
+    if not example and overloaded:
+        return _overloaded_response()
     if not example:
         return jsonify({"error": "Unable to create a sentence right now."}), 502
 
@@ -4,4 +4,9 @@ from .database import database
 from .dictionary_entry import DictionaryEntry
 from .daily_exercise_total import DailyExerciseTotal
 from .exercise_log import ExerciseLog
+from .translation_memory import TranslationMemory
 from .user import User
+from .distractor_stock import DistractorSet
+from .example_buffer import BufferedExample
+from .entry_examples import EntryExample
+from .sync import EntryTombstone
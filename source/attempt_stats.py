@@ -0,0 +1,62 @@
+"""Running per-entry attempt aggregates, kept in step with ExerciseLog inserts."""
+from datetime import datetime
+
+from peewee import fn
+
+from .database import database
+from .dictionary_entry import DictionaryEntry
+from .exercise_log import ExerciseLog
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def record_attempt(user, entry: DictionaryEntry | None, kind: str, attempt_score: int) -> ExerciseLog:
+    """
+    Log an exercise attempt and, in the same transaction, bump the entry's
+    attempt aggregates. The in-memory entry is updated to match, so callers
+    can recompute its probability without reading it back.
+    """
+    now = datetime.utcnow()
+    with database.atomic():
+        log = ExerciseLog.create(user=user, entry=entry, kind=kind, attempt_score=attempt_score, created_at=now)
+        if entry is not None:
+            DictionaryEntry.update(
+                attempt_count=DictionaryEntry.attempt_count + 1,
+                attempt_score_sum=DictionaryEntry.attempt_score_sum + attempt_score,
+                last_attempt_at=now,
+            ).where(DictionaryEntry.id == entry.id).execute()
+
+    if entry is not None:
+        entry.attempt_count = (entry.attempt_count or 0) + 1
+        entry.attempt_score_sum = (entry.attempt_score_sum or 0) + attempt_score
+        entry.last_attempt_at = now
+    return log
+
+
+def average_attempt_score(entry: DictionaryEntry) -> float | None:
+    if not entry.attempt_count:
+        return None
+    return entry.attempt_score_sum / entry.attempt_count
+
+
+def backfill(batch_size: int = BACKFILL_BATCH_SIZE, db=database) -> int:
+    """Recompute every entry's aggregates from ExerciseLog in id-range batches; returns entries updated."""
+    own_logs = (ExerciseLog.entry == DictionaryEntry.id) & (ExerciseLog.user == DictionaryEntry.user)
+    attempt_count = ExerciseLog.select(fn.COUNT(ExerciseLog.id)).where(own_logs)
+    attempt_score_sum = ExerciseLog.select(fn.COALESCE(fn.SUM(ExerciseLog.attempt_score), 0)).where(own_logs)
+    last_attempt_at = ExerciseLog.select(fn.MAX(ExerciseLog.created_at)).where(own_logs)
+
+    max_id = DictionaryEntry.select(fn.MAX(DictionaryEntry.id)).scalar() or 0
+    updated = 0
+    for start in range(1, max_id + 1, batch_size):
+        with db.atomic():
+            updated += (
+                DictionaryEntry.update(
+                    attempt_count=attempt_count,
+                    attempt_score_sum=attempt_score_sum,
+                    last_attempt_at=last_attempt_at,
+                )
+                .where(DictionaryEntry.id.between(start, start + batch_size - 1))
+                .execute()
+            )
+    return updated
@@ -0,0 +1,79 @@
+"""Thread pools for work that should not hold up the request that triggered it."""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .database import database
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+
+
+class Pool:
+    """
+    A lazily started thread pool. Tasks open short database connections around
+    their queries (`with database.connection_context():`) rather than holding
+    one across slow backend calls; any connection a task leaves open is closed
+    when it ends.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def _run(self, key, fn, args, kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            logger.exception("Background task %s failed.", getattr(fn, "__name__", fn))
+        finally:
+            if not database.is_closed():
+                database.close()
+            if key is not None:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def submit(self, fn, *args, **kwargs):
+        return self._get_executor().submit(self._run, None, fn, args, kwargs)
+
+    def submit_once(self, key, fn, *args, **kwargs):
+        """Like `submit`, but skip the call while a task with the same key is still queued or running."""
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        try:
+            return self._get_executor().submit(self._run, key, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending.discard(key)
+            raise
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+_default_pool = Pool("background", BACKGROUND_WORKERS)
+
+
+def submit(fn, *args, **kwargs):
+    """Run `fn` on the shared pool."""
+    return _default_pool.submit(fn, *args, **kwargs)
+
+
+def submit_once(key, fn, *args, **kwargs):
+    return _default_pool.submit_once(key, fn, *args, **kwargs)
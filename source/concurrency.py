@@ -0,0 +1,133 @@
+"""Bounded concurrency for OpenAI calls with round-robin fair queuing between users."""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import metrics
+
+LLM_CONCURRENCY_LIMIT = int(os.getenv("LLM_CONCURRENCY_LIMIT", "4"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Set per request by the web layer; work started outside a request shares one background queue.
+current_user = contextvars.ContextVar("llm_user", default="background")
+
+_queue_depth = metrics.gauge("llm_gate_queue_depth", "Calls waiting for an OpenAI concurrency slot.")
+_active_calls = metrics.gauge("llm_gate_active", "OpenAI calls currently holding a concurrency slot.")
+_wait_seconds = metrics.histogram(
+    "llm_gate_wait_seconds",
+    "Time spent waiting for an OpenAI concurrency slot.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_timeouts_total = metrics.counter(
+    "llm_gate_timeouts_total", "Calls rejected after waiting past the queue deadline."
+)
+
+
+class QueueTimeout(RuntimeError):
+    """Raised when a call waits longer than the queue deadline for a slot."""
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class FairGate:
+    """
+    Allow at most `limit` concurrent holders. Waiters queue per user and freed
+    slots go to users in round-robin order, so one user's burst cannot starve
+    everyone else.
+    """
+
+    def __init__(self, limit: int, timeout: float):
+        self.limit = max(1, limit)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._queues = {}
+        self._rotation = deque()
+
+    def acquire(self, user: str) -> None:
+        started = time.monotonic()
+        with self._lock:
+            if self._active < self.limit and not self._rotation:
+                self._active += 1
+                _active_calls.set(self._active)
+                _wait_seconds.observe(0.0)
+                return
+            waiter = _Waiter()
+            queue = self._queues.get(user)
+            if queue is None:
+                queue = self._queues[user] = deque()
+                self._rotation.append(user)
+            queue.append(waiter)
+            self._waiting += 1
+            _queue_depth.set(self._waiting)
+
+        waiter.event.wait(self.timeout)
+
+        with self._lock:
+            _wait_seconds.observe(time.monotonic() - started)
+            if waiter.granted:
+                return
+            queue = self._queues.get(user)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[user]
+                    self._rotation.remove(user)
+            self._waiting -= 1
+            _queue_depth.set(self._waiting)
+        _timeouts_total.inc()
+        raise QueueTimeout("Too many AI requests are in progress. Please try again shortly.")
+
+    def release(self) -> None:
+        with self._lock:
+            if self._rotation:
+                # Hand the slot straight to the next user in rotation.
+                user = self._rotation.popleft()
+                queue = self._queues[user]
+                waiter = queue.popleft()
+                if queue:
+                    self._rotation.append(user)
+                else:
+                    del self._queues[user]
+                self._waiting -= 1
+                _queue_depth.set(self._waiting)
+                waiter.granted = True
+                waiter.event.set()
+                return
+            self._active -= 1
+            _active_calls.set(self._active)
+
+    @contextmanager
+    def slot(self, user: str | None = None):
+        self.acquire(user or current_user.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+
+llm_gate = FairGate(LLM_CONCURRENCY_LIMIT, LLM_QUEUE_TIMEOUT_SECONDS)
+
+
+def is_queue_timeout(exc: BaseException | None) -> bool:
+    """True if `exc` or anything it was raised from or while handling is a QueueTimeout."""
+    seen = set()
+    stack = [exc]
+    while stack:
+        exc = stack.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        if isinstance(exc, QueueTimeout):
+            return True
+        seen.add(id(exc))
+        # An explicit `raise ... from` cause can hide the exception being handled, so follow both.
+        stack.extend((exc.__cause__, exc.__context__))
+    return False
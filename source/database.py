@@ -1,13 +1,113 @@
-"""Database configuration for SQLite (default) or Postgres via DATABASE_URL."""
+"""Database configuration for SQLite (default) or pooled Postgres via DATABASE_URL."""
 import os
+import time
 import urllib.parse as urlparse
 
-from peewee import PostgresqlDatabase, SqliteDatabase
+from peewee import SqliteDatabase
+from playhouse.pool import MaxConnectionsExceeded, PooledPostgresqlDatabase
+
+from . import metrics
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# How long a SQLite write waits for another connection's write lock before failing.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _default_pool_size() -> int:
+    """
+    One connection for every thread in a worker that may hold one at once: the
+    gunicorn request threads, the background pools that touch the database
+    (they connect only around queries, never across backend calls) and the
+    probability recompute thread. The defaults mirror the Procfile, background
+    and example_buffer, which cannot be imported from here.
+    """
+    request_threads = int(os.getenv("GUNICORN_THREADS", "8"))
+    background_threads = int(os.getenv("BACKGROUND_WORKERS", "2")) + int(os.getenv("EXAMPLE_PREFETCH_WORKERS", "2"))
+    return request_threads + background_threads + 1
+
+
+# Pool settings read from (and stripped out of) the DATABASE_URL query string.
+_POOL_DEFAULTS = {
+    "pool_max_size": str(_default_pool_size()),
+    "pool_stale_timeout": "300",
+    "pool_timeout": "10",
+    "pool_health_check": "on",
+    "pool_health_check_idle": "30",
+}
+
+_pool_wait_seconds = metrics.histogram(
+    "db_pool_wait_seconds",
+    "Time spent checking a Postgres connection out of the pool.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+_pool_timeouts_total = metrics.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up waiting for a free pooled connection."
+)
+_pool_discarded_total = metrics.counter(
+    "db_pool_discarded_total", "Pooled connections thrown away on checkout, by reason."
+)
+_pool_connections = metrics.gauge("db_pool_connections", "Pooled Postgres connections by state.")
+_pool_max_connections = metrics.gauge("db_pool_max_connections", "Configured size of the Postgres connection pool.")
+
+
+class MonitoredPooledPostgresqlDatabase(PooledPostgresqlDatabase):
+    """
+    Connection pool that records checkout waits and, when `health_check_idle`
+    is set, pings connections idle longer than that many seconds before
+    handing them out.
+    """
+
+    def __init__(self, database, health_check_idle: float | None = None, **kwargs):
+        self._health_check_idle = health_check_idle
+        self._returned_at = {}
+        super().__init__(database, **kwargs)
+
+    def connect(self, reuse_if_open=False):
+        started = time.monotonic()
+        try:
+            return super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            _pool_timeouts_total.inc()
+            raise
+        finally:
+            _pool_wait_seconds.observe(time.monotonic() - started)
 
+    def _is_closed(self, conn):
+        returned_at = self._returned_at.pop(self.conn_key(conn), None)
+        if super()._is_closed(conn):
+            _pool_discarded_total.inc(reason="closed")
+            return True
+        if self._health_check_idle is None or returned_at is None:
+            return False
+        if time.time() - returned_at < self._health_check_idle:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            _pool_discarded_total.inc(reason="health_check")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return True
+        return False
 
-def _postgres_database(url: str) -> PostgresqlDatabase:
+    def _close(self, conn, close_conn=False):
+        key = self.conn_key(conn)
+        returning = not close_conn and key in self._in_use
+        super()._close(conn, close_conn)
+        if returning:
+            self._returned_at[key] = time.time()
+        else:
+            self._returned_at.pop(key, None)
+
+    def pool_stats(self) -> dict:
+        with self._pool_lock:
+            return {"in_use": len(self._in_use), "idle": len(self._connections), "max": self._max_connections}
+
+
+def _postgres_database(url: str) -> MonitoredPooledPostgresqlDatabase:
     urlparse.uses_netloc.append("postgres")
     parsed = urlparse.urlparse(url)
     query_params = {key: values[0] for key, values in urlparse.parse_qs(parsed.query).items()}
@@ -16,18 +116,49 @@ def _postgres_database(url: str) -> PostgresqlDatabase:
     # explicitly overridden in the URL query.
     query_params.setdefault("sslmode", "require")
 
-    return PostgresqlDatabase(
+    pool = {name: query_params.pop(name, default) for name, default in _POOL_DEFAULTS.items()}
+    health_check = pool["pool_health_check"].strip().lower() not in ("", "off", "0", "false", "no")
+
+    return MonitoredPooledPostgresqlDatabase(
         parsed.path.lstrip("/"),  # Database name (remove leading '/')
         user=parsed.username,
         password=parsed.password,
         host=parsed.hostname,
         port=parsed.port or 5432,
+        max_connections=int(pool["pool_max_size"]),
+        stale_timeout=int(pool["pool_stale_timeout"]) or None,
+        # playhouse.pool treats 0 as "wait forever"; None raises as soon as the pool is full.
+        timeout=int(pool["pool_timeout"]) or None,
+        health_check_idle=float(pool["pool_health_check_idle"]) if health_check else None,
         **query_params,
     )
 
 
+def _collect_pool_stats():
+    stats = database.pool_stats()
+    _pool_connections.set(stats["in_use"], state="in_use")
+    _pool_connections.set(stats["idle"], state="idle")
+    _pool_max_connections.set(stats["max"] or 0)
+
+
 if DATABASE_URL:
     database = _postgres_database(DATABASE_URL)
+    metrics.register_collector(_collect_pool_stats)
 else:
     database_path = os.getenv("SQLITE_PATH", "database.db")
-    database = SqliteDatabase(database_path)
+    # WAL lets readers run alongside the one writer; writers queue for up to the busy timeout.
+    database = SqliteDatabase(
+        database_path,
+        pragmas={"journal_mode": "wal", "busy_timeout": SQLITE_BUSY_TIMEOUT_MS},
+    )
+
+
+def write_transaction():
+    """
+    `atomic()` for a transaction that reads before it writes. On SQLite it takes
+    the write lock at BEGIN (IMMEDIATE): a deferred transaction holding a read
+    lock cannot wait for the write lock, and fails with "database is locked".
+    """
+    if isinstance(database, SqliteDatabase):
+        return database.atomic("IMMEDIATE")
+    return database.atomic()
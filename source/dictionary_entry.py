@@ -4,7 +4,7 @@ from datetime import datetime
 from .base import Base
 from .user import User
 
-from peewee import BooleanField, DateTimeField, FloatField, ForeignKeyField, TextField
+from peewee import BooleanField, DateTimeField, FloatField, ForeignKeyField, IntegerField, TextField
 
 
 class DictionaryEntry(Base):
@@ -16,6 +16,21 @@ class DictionaryEntry(Base):
     created_at = DateTimeField(default=datetime.utcnow, null=True)
     last_seen_at = DateTimeField(null=True)
     probability_score = FloatField(default=0.8, null=False)
+    # Running totals over this entry's ExerciseLog rows, maintained by attempt_stats.record_attempt.
+    attempt_count = IntegerField(default=0, null=False)
+    attempt_score_sum = IntegerField(default=0, null=False)
+    last_attempt_at = DateTimeField(null=True)
+    # Bumped by sync.touch whenever the entry, its examples or its scores change.
+    updated_at = DateTimeField(null=True)
+    change_seq = IntegerField(default=0, null=False)
+
+    class Meta:
+        # Entry lists are per user newest first; progress charts filter per user by creation date.
+        # The (user, change_seq) index read by /sync is created by migration 8, after its column.
+        indexes = (
+            (("user", "id"), False),
+            (("user", "created_at"), False),
+        )
 
     def __str__(self) -> str:
         return (
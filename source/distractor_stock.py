@@ -0,0 +1,105 @@
+"""Pre-generated flashcard distractor sets, kept in stock per dictionary entry."""
+import json
+import os
+from datetime import datetime, timedelta
+
+from peewee import CharField, DateTimeField, ForeignKeyField, TextField
+
+from . import background, llm_actions
+from .base import Base
+from .database import database
+from .dictionary_entry import DictionaryEntry
+
+DISTRACTOR_STOCK_DEPTH = int(os.getenv("DISTRACTOR_STOCK_DEPTH", "2"))
+DISTRACTOR_STOCK_MAX_AGE_DAYS = int(os.getenv("DISTRACTOR_STOCK_MAX_AGE_DAYS", "30"))
+# eager: top up on save and after every use; lazy: top up only after a miss; off: never.
+DISTRACTOR_STOCK_REFILL = os.getenv("DISTRACTOR_STOCK_REFILL", "eager").strip().lower()
+
+# Another worker may take the same row first; retry a few times before reporting a miss.
+_TAKE_ATTEMPTS = 3
+
+
+class DistractorSet(Base):
+    entry = ForeignKeyField(DictionaryEntry, backref="distractor_sets", on_delete="CASCADE")
+    # The entry texts the set was generated for, so stale stock is never served.
+    target_text = TextField(null=False)
+    target_translation = TextField(null=False)
+    part_of_speech = CharField(null=False)
+    distractors = TextField(null=False)
+    created_at = DateTimeField(default=datetime.utcnow, null=False)
+
+    class Meta:
+        indexes = ((("entry", "created_at"), False),)
+
+
+def _fresh_condition(entry: DictionaryEntry):
+    condition = (
+        (DistractorSet.entry == entry.id)
+        & (DistractorSet.target_text == (entry.text or "").strip())
+        & (DistractorSet.target_translation == (entry.translation or "").strip())
+    )
+    if DISTRACTOR_STOCK_MAX_AGE_DAYS > 0:
+        cutoff = datetime.utcnow() - timedelta(days=DISTRACTOR_STOCK_MAX_AGE_DAYS)
+        condition &= DistractorSet.created_at >= cutoff
+    return condition
+
+
+def take(entry: DictionaryEntry):
+    """Remove and return one stocked set shaped like `generate_ai_practise_cards`, or None."""
+    if DISTRACTOR_STOCK_DEPTH <= 0:
+        return None
+
+    for _ in range(_TAKE_ATTEMPTS):
+        row = (
+            DistractorSet.select()
+            .where(_fresh_condition(entry))
+            .order_by(DistractorSet.created_at)
+            .first()
+        )
+        if row is None:
+            return None
+        if DistractorSet.delete().where(DistractorSet.id == row.id).execute() == 1:
+            return {"part_of_speech": row.part_of_speech, "distractors": json.loads(row.distractors)}
+    return None
+
+
+def fill(entry_id: int) -> int:
+    """Generate sets until the entry holds DISTRACTOR_STOCK_DEPTH usable ones."""
+    # Connections only around the queries: each set is a seconds-long LLM call.
+    with database.connection_context():
+        entry = DictionaryEntry.get_or_none(DictionaryEntry.id == entry_id)
+        if entry is None:
+            return 0
+        target_text = (entry.text or "").strip()
+        target_translation = (entry.translation or "").strip()
+        if not target_text or not target_translation:
+            return 0
+
+        DistractorSet.delete().where(
+            (DistractorSet.entry == entry.id) & ~_fresh_condition(entry)
+        ).execute()
+
+        missing = DISTRACTOR_STOCK_DEPTH - DistractorSet.select().where(_fresh_condition(entry)).count()
+
+    created = 0
+    for _ in range(max(0, missing)):
+        ai_set = llm_actions.generate_ai_practise_cards(target_text, target_translation, fresh=True)
+        with database.connection_context():
+            DistractorSet.create(
+                entry=entry.id,
+                target_text=target_text,
+                target_translation=target_translation,
+                part_of_speech=ai_set["part_of_speech"],
+                distractors=json.dumps(ai_set["distractors"]),
+            )
+        created += 1
+    return created
+
+
+def schedule_fill(entry_id: int, after_miss: bool = False) -> None:
+    """Top up the entry's stock in the background if the refill policy allows it."""
+    if DISTRACTOR_STOCK_DEPTH <= 0 or DISTRACTOR_STOCK_REFILL == "off":
+        return
+    if DISTRACTOR_STOCK_REFILL == "lazy" and not after_miss:
+        return
+    background.submit_once(("distractor_stock", entry_id), fill, entry_id)
@@ -0,0 +1,182 @@
+"""Usage examples stored per dictionary entry, and generation of non-repeating ones."""
+import json
+import re
+from datetime import datetime
+
+from peewee import DateTimeField, ForeignKeyField, TextField
+
+from . import concurrency, llm_actions, pronunciation, sync
+from .base import Base
+from .database import database, write_transaction
+from .dictionary_entry import DictionaryEntry
+from .example_similarity import ExampleIndex
+
+# Entry ids per IN (...) list; stays under SQLite's bound-parameter limit.
+_ENTRY_ID_CHUNK = 500
+
+
+class EntryExample(Base):
+    entry = ForeignKeyField(DictionaryEntry, backref="examples", on_delete="CASCADE")
+    danish = TextField(null=False)
+    english = TextField(null=False)
+    created_at = DateTimeField(default=datetime.utcnow, null=False)
+
+    class Meta:
+        # Examples are always read per entry, oldest first.
+        indexes = ((("entry", "id"), False),)
+
+
+def _as_dict(example: EntryExample) -> dict:
+    return {"id": example.id, "danish": example.danish, "english": example.english}
+
+
+def load_examples(entry: DictionaryEntry) -> list:
+    query = EntryExample.select().where(EntryExample.entry == entry.id).order_by(EntryExample.id)
+    return [_as_dict(example) for example in query]
+
+
+def load_examples_for_entries(entry_ids) -> dict:
+    """Examples for many entries with one query per chunk of ids, keyed by entry id."""
+    grouped = {entry_id: [] for entry_id in entry_ids}
+    ids = list(grouped)
+    for start in range(0, len(ids), _ENTRY_ID_CHUNK):
+        query = (
+            EntryExample.select()
+            .where(EntryExample.entry.in_(ids[start : start + _ENTRY_ID_CHUNK]))
+            .order_by(EntryExample.entry, EntryExample.id)
+        )
+        for example in query:
+            grouped[example.entry_id].append(_as_dict(example))
+    return grouped
+
+
+def save_example(entry: DictionaryEntry, danish: str, english: str, append: bool = False, max_examples: int | None = None):
+    """
+    Store the example on the entry, replacing the stored ones unless `append`.
+    Returns the stored example with its id, or None if it paraphrases one
+    already stored. With `max_examples` the oldest rows beyond it are removed.
+    """
+    example = {"danish": danish or "", "english": english or ""}
+    with write_transaction():
+        current = load_examples(entry) if append else []
+        if is_duplicate_example(current, example):
+            return None
+        if not append:
+            EntryExample.delete().where(EntryExample.entry == entry.id).execute()
+        row = EntryExample.create(entry=entry.id, danish=example["danish"], english=example["english"])
+
+        if isinstance(max_examples, int) and max_examples > 0:
+            excess = [stored["id"] for stored in current][: max(0, len(current) + 1 - max_examples)]
+            if excess:
+                EntryExample.delete().where(EntryExample.id.in_(excess)).execute()
+        sync.touch(entry)
+
+    pronunciation.schedule([example["danish"]])
+    return _as_dict(row)
+
+
+def delete_example(entry: DictionaryEntry, example_id: int) -> bool:
+    with database.atomic():
+        deleted = (
+            EntryExample.delete()
+            .where((EntryExample.entry == entry.id) & (EntryExample.id == example_id))
+            .execute()
+        )
+        if deleted:
+            sync.touch(entry)
+    return deleted > 0
+
+
+def load_examples_from_notes(notes: str):
+    """Parse the JSON examples blob entries kept in `notes` before the EntryExample table."""
+    try:
+        data = json.loads(notes or "")
+        if isinstance(data, dict):
+            if isinstance(data.get("examples"), list):
+                examples = []
+                for item in data["examples"]:
+                    if not isinstance(item, dict):
+                        continue
+                    danish = (item.get("danish") or item.get("example_da") or "").strip()
+                    english = (item.get("english") or item.get("example_en") or "").strip()
+                    if danish or english:
+                        examples.append({"danish": danish, "english": english})
+                if examples:
+                    return dedup_examples(examples)
+            danish = (data.get("example_da") or data.get("danish") or "").strip()
+            english = (data.get("example_en") or data.get("english") or "").strip()
+            if danish or english:
+                return dedup_examples([{"danish": danish, "english": english}])
+    except Exception:
+        return []
+    return []
+
+
+def dedup_examples(examples):
+    seen = set()
+    unique = []
+    for item in examples:
+        danish_key = (item.get("danish") or "").strip().lower()
+        english_key = (item.get("english") or "").strip().lower()
+        key = (danish_key, english_key)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+    return unique
+
+
+def normalize_example_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def is_duplicate_example(existing_examples, candidate) -> bool:
+    """True if `candidate` repeats or closely paraphrases any of `existing_examples`."""
+    if not candidate or not existing_examples:
+        return False
+    return ExampleIndex(existing_examples).is_duplicate(candidate)
+
+
+def generate_unique_example(
+    entry: DictionaryEntry,
+    max_attempts: int = 3,
+    require_unique: bool = True,
+    known_examples=None,
+    stored_examples=None,
+):
+    """
+    Generate an example that repeats none of the entry's stored examples, nor any
+    of `known_examples` (e.g. ones already generated but not yet stored). Pass
+    `stored_examples` if already loaded, and no query is made.
+    """
+    if stored_examples is None:
+        stored_examples = load_examples(entry)
+    existing = list(stored_examples) + list(known_examples or [])
+    avoid = [ex.get("danish") or "" for ex in existing if ex.get("danish")]
+    index = ExampleIndex(existing)
+
+    for attempt in range(max_attempts):
+        example = None
+        try:
+            example = llm_actions.generate_usage_example_pair(
+                entry.text or "",
+                entry.translation or "",
+                avoid_examples=avoid,
+            )
+        except concurrency.QueueTimeout:
+            # Retrying would only queue again; let the caller report that we are busy.
+            raise
+        except Exception:
+            example = None
+
+        if not example:
+            continue
+
+        if not index.is_duplicate(example):
+            return example
+
+        # Later attempts must not paraphrase a rejected candidate either.
+        index.add(example)
+        avoid.append(example.get("danish") or "")
+
+    return None if require_unique else (example if example else None)
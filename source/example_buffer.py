@@ -0,0 +1,104 @@
+"""Prefetched cloze examples, kept topped up in the background for recently practised entries."""
+import os
+from datetime import datetime
+
+from peewee import DateTimeField, ForeignKeyField, TextField
+
+from . import background, entry_examples
+from .base import Base
+from .database import database
+from .dictionary_entry import DictionaryEntry
+from .example_similarity import ExampleIndex
+
+EXAMPLE_BUFFER_SIZE = int(os.getenv("EXAMPLE_BUFFER_SIZE", "2"))
+EXAMPLE_PREFETCH_WORKERS = int(os.getenv("EXAMPLE_PREFETCH_WORKERS", "2"))
+
+# Another worker may pop the same row first; retry a few times before reporting a miss.
+_POP_ATTEMPTS = 5
+
+_pool = background.Pool("example-prefetch", EXAMPLE_PREFETCH_WORKERS)
+
+
+class BufferedExample(Base):
+    entry = ForeignKeyField(DictionaryEntry, backref="buffered_examples", on_delete="CASCADE")
+    # The Danish target the example was generated for, so stale examples are never served.
+    target_translation = TextField(null=False)
+    danish = TextField(null=False)
+    english = TextField(null=False)
+    created_at = DateTimeField(default=datetime.utcnow, null=False)
+
+    class Meta:
+        indexes = ((("entry", "created_at"), False),)
+
+
+def _current_condition(entry: DictionaryEntry):
+    return (BufferedExample.entry == entry.id) & (
+        BufferedExample.target_translation == (entry.translation or "").strip()
+    )
+
+
+def pop(entry: DictionaryEntry, existing_examples=None):
+    """Remove and return one buffered example the entry has not stored yet, or None."""
+    if EXAMPLE_BUFFER_SIZE <= 0:
+        return None
+    if existing_examples is None:
+        existing_examples = entry_examples.load_examples(entry)
+    index = ExampleIndex(existing_examples)
+
+    for _ in range(_POP_ATTEMPTS):
+        row = (
+            BufferedExample.select()
+            .where(_current_condition(entry))
+            .order_by(BufferedExample.created_at)
+            .first()
+        )
+        if row is None:
+            return None
+        if BufferedExample.delete().where(BufferedExample.id == row.id).execute() != 1:
+            continue
+        example = {"danish": row.danish, "english": row.english}
+        if not index.is_duplicate(example):
+            return example
+    return None
+
+
+def top_up(entry_id: int) -> int:
+    """Generate examples until the entry has EXAMPLE_BUFFER_SIZE unseen ones buffered."""
+    # Connections only around the queries: each generation is a seconds-long LLM call.
+    with database.connection_context():
+        entry = DictionaryEntry.get_or_none(DictionaryEntry.id == entry_id)
+        if entry is None or not (entry.text or "").strip() or not (entry.translation or "").strip():
+            return 0
+
+        BufferedExample.delete().where(
+            (BufferedExample.entry == entry.id) & ~_current_condition(entry)
+        ).execute()
+
+        buffered = [
+            {"danish": row.danish, "english": row.english}
+            for row in BufferedExample.select().where(_current_condition(entry))
+        ]
+        stored = entry_examples.load_examples(entry)
+
+    created = 0
+    for _ in range(max(0, EXAMPLE_BUFFER_SIZE - len(buffered))):
+        example = entry_examples.generate_unique_example(entry, known_examples=buffered, stored_examples=stored)
+        if not example:
+            break
+        with database.connection_context():
+            BufferedExample.create(
+                entry=entry.id,
+                target_translation=(entry.translation or "").strip(),
+                danish=example.get("danish") or "",
+                english=example.get("english") or "",
+            )
+        buffered.append(example)
+        created += 1
+    return created
+
+
+def schedule_top_up(entry_id: int) -> None:
+    """Queue a top-up for the entry unless one is already queued or running in this worker."""
+    if EXAMPLE_BUFFER_SIZE <= 0:
+        return
+    _pool.submit_once(entry_id, top_up, entry_id)
@@ -0,0 +1,77 @@
+"""Near-duplicate detection for usage examples via character n-gram Jaccard similarity."""
+import os
+import re
+from collections import defaultdict
+
+# Examples at or above this Jaccard similarity (0-1) count as paraphrases of each other.
+EXAMPLE_SIMILARITY_THRESHOLD = float(os.getenv("EXAMPLE_SIMILARITY_THRESHOLD", "0.6"))
+EXAMPLE_SHINGLE_SIZE = int(os.getenv("EXAMPLE_SHINGLE_SIZE", "3"))
+
+_FIELDS = ("danish", "english")
+
+
+def normalize(text: str) -> str:
+    """Casefold, drop punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s]", " ", (text or "").casefold())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, size: int = EXAMPLE_SHINGLE_SIZE) -> frozenset:
+    normalized = normalize(text)
+    if not normalized:
+        return frozenset()
+    padded = f" {normalized} "
+    if len(padded) <= size:
+        return frozenset((padded,))
+    return frozenset(padded[i : i + size] for i in range(len(padded) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    overlap = len(a & b)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+class ExampleIndex:
+    """
+    Inverted shingle index over one entry's examples. Building it reads every
+    example once, so it only pays off when several candidates are checked
+    against the same set, as across generate_unique_example's retries; a
+    single check is still linear in the stored examples.
+    """
+
+    def __init__(self, examples=(), threshold: float | None = None):
+        self.threshold = EXAMPLE_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self._sizes = {field: [] for field in _FIELDS}
+        self._postings = {field: defaultdict(list) for field in _FIELDS}
+        for example in examples:
+            self.add(example)
+
+    def add(self, example) -> None:
+        for field in _FIELDS:
+            grams = shingles((example or {}).get(field) or "")
+            doc_id = len(self._sizes[field])
+            self._sizes[field].append(len(grams))
+            for gram in grams:
+                self._postings[field][gram].append(doc_id)
+
+    def similarity(self, example) -> float:
+        """Highest Jaccard similarity between `example` and any indexed example, per language."""
+        best = 0.0
+        for field in _FIELDS:
+            grams = shingles((example or {}).get(field) or "")
+            if not grams:
+                continue
+            overlaps = defaultdict(int)
+            for gram in grams:
+                for doc_id in self._postings[field].get(gram, ()):
+                    overlaps[doc_id] += 1
+            for doc_id, overlap in overlaps.items():
+                score = overlap / (len(grams) + self._sizes[field][doc_id] - overlap)
+                if score > best:
+                    best = score
+        return best
+
+    def is_duplicate(self, example) -> bool:
+        return self.similarity(example) >= self.threshold
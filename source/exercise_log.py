@@ -15,3 +15,7 @@ class ExerciseLog(Base):
     created_at = DateTimeField(default=datetime.utcnow, null=True)
     # 1: correct first attempt, 2: second, 3: third-or-later, 4: never correct
     attempt_score = IntegerField(default=1, null=False)
+
+    class Meta:
+        # Per-entry attempt history and exercise counts are always looked up per user.
+        indexes = ((("user", "entry"), False),)
@@ -0,0 +1,292 @@
+"""
+Deterministic local stand-ins for OpenAI, Google Translate and Text-to-Speech.
+
+Select them with EXTERNAL_BACKENDS=fake (or per service with LLM_BACKEND,
+TRANSLATE_BACKEND, TTS_BACKEND). Latency, error rate and canned payloads are
+configurable so the full request path can be benchmarked without a network:
+
+- FAKE_LATENCY / FAKE_<SERVICE>_LATENCY: "fixed:MS", "uniform:MIN_MS:MAX_MS",
+  "normal:MEAN_MS:STDDEV_MS" or "lognormal:MEDIAN_MS:SIGMA" (default "fixed:0").
+- FAKE_ERROR_RATE / FAKE_<SERVICE>_ERROR_RATE: probability (0-1) that a call fails.
+- FAKE_PAYLOADS: path to a JSON file with canned responses, shaped
+  {"chat": [{"match": "substring of the prompt", "response": "..."}],
+   "translate": {"da": {"house": "hus"}, "en": {"hus": "house"}}}.
+- FAKE_SEED: seed mixed into every per-request random draw.
+
+Draws are seeded from the request content, so a given request always gets the
+same latency, outcome and payload.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+
+FAKE_SEED = os.getenv("FAKE_SEED", "0")
+
+
+def enabled(service: str) -> bool:
+    """True if `service` ("llm", "translate" or "tts") should use its fake backend."""
+    mode = os.getenv(f"{service.upper()}_BACKEND") or os.getenv("EXTERNAL_BACKENDS") or "live"
+    return mode.strip().lower() == "fake"
+
+
+def _setting(service: str, name: str, default: str) -> str:
+    return os.getenv(f"FAKE_{service.upper()}_{name}") or os.getenv(f"FAKE_{name}") or default
+
+
+def _rng(service: str, content: str) -> random.Random:
+    digest = hashlib.sha256(f"{FAKE_SEED}:{service}:{content}".encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _latency_seconds(spec: str, rng: random.Random) -> float:
+    kind, _, params = (spec or "fixed:0").partition(":")
+    values = [float(value) for value in params.split(":") if value]
+    kind = kind.strip().lower()
+    if kind == "uniform" and len(values) == 2:
+        millis = rng.uniform(values[0], values[1])
+    elif kind == "normal" and len(values) == 2:
+        millis = rng.gauss(values[0], values[1])
+    elif kind == "lognormal" and len(values) == 2:
+        millis = values[0] * math.exp(rng.gauss(0.0, values[1]))
+    elif values:
+        millis = values[0]
+    else:
+        raise ValueError(f"Unsupported fake latency spec: {spec!r}")
+    return max(0.0, millis) / 1000.0
+
+
+class _Call:
+    """Latency and outcome drawn for one fake request."""
+
+    def __init__(self, service: str, content: str):
+        rng = _rng(service, content)
+        self.service = service
+        self.latency = _latency_seconds(_setting(service, "LATENCY", "fixed:0"), rng)
+        self.fails = rng.random() < float(_setting(service, "ERROR_RATE", "0"))
+
+    def wait(self, fraction: float = 1.0) -> None:
+        if self.latency:
+            time.sleep(self.latency * fraction)
+
+    def finish(self) -> None:
+        self.wait()
+        self.raise_if_failing()
+
+    def raise_if_failing(self) -> None:
+        if self.fails:
+            raise RuntimeError(f"Injected {self.service} failure.")
+
+
+_payloads = None
+
+
+def _canned_payloads() -> dict:
+    global _payloads
+    if _payloads is None:
+        path = os.getenv("FAKE_PAYLOADS")
+        if path:
+            with open(path, encoding="utf-8") as handle:
+                _payloads = json.load(handle)
+        else:
+            _payloads = {}
+    return _payloads
+
+
+_FAKE_WORDS = ["window", "river", "pencil", "garden", "ladder", "kettle", "button", "candle", "tunnel"]
+# Distinct sentence shapes, so generated examples do not read as paraphrases of each other.
+_FAKE_EXAMPLES = [
+    ("Jeg tænker tit på {} om morgenen.", "I often think about {} in the morning."),
+    ("Kan du huske {} fra sidste sommer?", "Do you remember {} from last summer?"),
+    ("Min bror siger, at {} er vigtigt.", "My brother says that {} is important."),
+    ("Hvorfor taler alle om {} lige nu?", "Why is everyone talking about {} right now?"),
+    ("Vi skal bruge {} til festen i weekenden.", "We need {} for the party this weekend."),
+    ("Læreren forklarede {} meget tydeligt.", "The teacher explained {} very clearly."),
+    ("- Har du set {}? - Nej, desværre ikke.", "- Have you seen {}? - No, unfortunately not."),
+    ("Efter arbejde drømmer hun om {}.", "After work she dreams about {}."),
+]
+
+
+def _field(prompt: str, label: str) -> str:
+    match = re.search(rf"^{re.escape(label)}:\s*(.*)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def _chat_reply(messages) -> str:
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    prompt = f"{system}\n{user}"
+    rng = _rng("llm-payload", prompt)
+
+    for canned in _canned_payloads().get("chat", []):
+        if canned.get("match", "") in prompt:
+            return canned.get("response", "")
+
+    if "distractor" in system:
+        target = _field(user, "TARGET_ENGLISH")
+        words = [word for word in _FAKE_WORDS if word != target.lower()]
+        rng.shuffle(words)
+        return json.dumps(
+            {
+                "part_of_speech": "noun",
+                "distractors": [
+                    {"text": word, "translation": f"[da] {word}", "note": "fake distractor"}
+                    for word in words[:3]
+                ],
+            }
+        )
+
+    if '{"texts": [...]}' in system:
+        texts = json.loads(user).get("texts", [])
+        language = "da" if "into natural Danish" in system else "en"
+        return json.dumps({"translations": [f"[{language}] {text}" for text in texts]})
+
+    if "Danish language tutor" in system:
+        target_da = _field(user, "TARGET (DA)")
+        target_en = _field(user, "TARGET (EN)")
+        danish, english = rng.choice(_FAKE_EXAMPLES)
+        danish, english = danish.format(target_da), english.format(target_en)
+        if '"danish"' in system:
+            return json.dumps({"danish": danish, "english": english}, ensure_ascii=False)
+        return danish
+
+    if "precise translator" in system:
+        return f"[en] {user}"
+
+    if "into natural Danish" in system:
+        return f"[da] {user}"
+    if "into natural English" in system:
+        return f"[en] {user}"
+    return f"[fake] {user[:200]}"
+
+
+def _usage(messages, content: str) -> dict:
+    prompt_tokens = sum(len((m.get("content") or "").split()) for m in messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(content.split()),
+        "total_tokens": prompt_tokens + len(content.split()),
+    }
+
+
+class _RawResponse:
+    retries_taken = 0
+
+    def __init__(self, parsed):
+        self._parsed = parsed
+
+    def parse(self):
+        return self._parsed
+
+
+class _FakeCompletions:
+    def create(self, model: str, messages, temperature: float = 1.0, stream: bool = False, **_kwargs):
+        from openai.types.chat import ChatCompletion
+
+        content = _chat_reply(messages)
+        call = _Call("llm", json.dumps(messages, sort_keys=True))
+        if stream:
+            return self._stream(call, model, messages, content)
+
+        call.finish()
+        return ChatCompletion.model_validate(
+            {
+                "id": "fake-completion",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": _usage(messages, content),
+            }
+        )
+
+    def _stream(self, call: _Call, model: str, messages, content: str):
+        from openai.types.chat import ChatCompletionChunk
+
+        pieces = re.findall(r"\S+\s*", content) or [content]
+        # Spend a third of the latency before the first token, the rest spread across tokens.
+        call.wait(1 / 3)
+        call.raise_if_failing()
+        for piece in pieces:
+            call.wait((2 / 3) / len(pieces))
+            yield ChatCompletionChunk.model_validate(
+                {
+                    "id": "fake-chunk",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+            )
+        yield ChatCompletionChunk.model_validate(
+            {
+                "id": "fake-chunk",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": _usage(messages, content),
+            }
+        )
+
+
+class _FakeRawCompletions:
+    def __init__(self, completions: _FakeCompletions):
+        self._completions = completions
+
+    def create(self, **kwargs):
+        return _RawResponse(self._completions.create(**kwargs))
+
+
+class FakeOpenAI:
+    """Stands in for `openai.OpenAI` for the chat completion calls this app makes."""
+
+    def __init__(self):
+        completions = _FakeCompletions()
+        completions.with_raw_response = _FakeRawCompletions(completions)
+        self.chat = SimpleNamespace(completions=completions)
+
+
+class FakeTranslateClient:
+    """Stands in for `google.cloud.translate_v2.Client.translate`."""
+
+    def translate(self, values, target_language: str, format_: str = "text", **_kwargs):
+        single = isinstance(values, str)
+        texts = [values] if single else list(values)
+        _Call("translate", json.dumps([target_language, texts])).finish()
+
+        canned = _canned_payloads().get("translate", {}).get(target_language, {})
+        results = [
+            {
+                "translatedText": canned.get(text) or f"[{target_language}] {text}",
+                "detectedSourceLanguage": "en" if target_language == "da" else "da",
+                "input": text,
+            }
+            for text in texts
+        ]
+        return results[0] if single else results
+
+
+# One silent MPEG-1 Layer III frame (128 kbit/s, 44.1 kHz), roughly 26 ms of audio.
+_SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class FakeTextToSpeechClient:
+    """Stands in for `google.cloud.texttospeech.TextToSpeechClient.synthesize_speech`."""
+
+    def synthesize_speech(self, input=None, voice=None, audio_config=None, **_kwargs):
+        text = getattr(input, "text", "") or ""
+        _Call("tts", text).finish()
+        # About 12 characters per second of speech.
+        frames = max(1, int(len(text) / 12 / 0.026))
+        return SimpleNamespace(audio_content=_SILENT_MP3_FRAME * frames)
@@ -1,25 +1,148 @@
 """LLM-backed helpers for translation, flashcard distractors, and example generation."""
+import hashlib
 import json
+import logging
+import math
 import os
 import re
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 
-from google.cloud import translate_v2 as translate
-from google.oauth2 import service_account
-from openai import OpenAI
+from . import concurrency, fake_backends, llm_cache, metrics, resilience, singleflight, translation_memory
 
-client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+logger = logging.getLogger(__name__)
+_openai_client = None
 _translate_client = None
 GOOGLE_PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT", "inlaid-antler-478921-f3")
+CHAT_MODEL = "gpt-4o"
+CHAT_TEMPERATURE = 0.4
+# Google Translate accepts at most 128 segments per request.
+GOOGLE_TRANSLATE_BATCH_SIZE = 128
+LLM_TRANSLATE_BATCH_SIZE = 50
+# Per-backend circuit breakers. Latency budgets are in milliseconds; slower calls count as failures.
+CIRCUIT_BREAKER_FAILURES = int(os.environ.get("CIRCUIT_BREAKER_FAILURES", "5"))
+CIRCUIT_BREAKER_RESET_SECONDS = float(os.environ.get("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+GOOGLE_TRANSLATE_BUDGET_MS = int(os.environ.get("GOOGLE_TRANSLATE_BUDGET_MS", "2000"))
+LLM_TRANSLATE_BUDGET_MS = int(os.environ.get("LLM_TRANSLATE_BUDGET_MS", "15000"))
+# Calls each backend may have running at once per worker; a hung backend cannot take the other's threads.
+CIRCUIT_BREAKER_MAX_CONCURRENT = int(os.environ.get("CIRCUIT_BREAKER_MAX_CONCURRENT", "8"))
+# Hedged mode starts the LLM fallback once Google is slower than this percentile of its recent latency.
+TRANSLATE_HEDGE = os.environ.get("TRANSLATE_HEDGE", "").strip().lower() in ("1", "true", "yes", "on")
+TRANSLATE_HEDGE_PERCENTILE = float(os.environ.get("TRANSLATE_HEDGE_PERCENTILE", "95"))
+
+google_translate_breaker = resilience.CircuitBreaker(
+    "google_translate",
+    CIRCUIT_BREAKER_FAILURES,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    GOOGLE_TRANSLATE_BUDGET_MS / 1000.0,
+    CIRCUIT_BREAKER_MAX_CONCURRENT,
+)
+llm_translate_breaker = resilience.CircuitBreaker(
+    "llm_translate",
+    CIRCUIT_BREAKER_FAILURES,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    LLM_TRANSLATE_BUDGET_MS / 1000.0,
+    CIRCUIT_BREAKER_MAX_CONCURRENT,
+    # A full LLM queue is local overload, not a failing provider.
+    is_local_error=concurrency.is_queue_timeout,
+)
+_hedges_total = metrics.counter(
+    "translation_hedged_requests_total", "Translations where the LLM fallback was started alongside a slow Google call."
+)
+# "combined" asks for both languages in one JSON response; "two_step" generates then translates.
+EXAMPLE_PAIR_MODE = os.environ.get("EXAMPLE_PAIR_MODE", "combined").strip().lower()
+
+
+_llm_duration = metrics.histogram(
+    "llm_request_duration_seconds", "Latency of chat completion calls to OpenAI by call site."
+)
+_llm_requests = metrics.counter(
+    "llm_requests_total", "Chat completions by call site and outcome (ok, error or cache_hit)."
+)
+_llm_retries = metrics.counter("llm_retries_total", "Retries the OpenAI client made, by call site.")
+_llm_prompt_tokens = metrics.counter("llm_prompt_tokens_total", "Prompt tokens billed, by call site.")
+_llm_completion_tokens = metrics.counter(
+    "llm_completion_tokens_total", "Completion tokens billed, by call site."
+)
+_translate_duration = metrics.histogram(
+    "google_translate_request_duration_seconds", "Latency of Google Translate calls by call site."
+)
+_translate_requests = metrics.counter(
+    "google_translate_requests_total", "Google Translate calls by call site and outcome."
+)
+_translate_characters = metrics.counter(
+    "google_translate_characters_total", "Characters sent to Google Translate, by call site."
+)
+
+
+def _record_usage(call_site: str, usage, retries_taken: int) -> None:
+    if retries_taken:
+        _llm_retries.inc(retries_taken, call_site=call_site)
+    if usage is not None:
+        _llm_prompt_tokens.inc(usage.prompt_tokens or 0, call_site=call_site)
+        _llm_completion_tokens.inc(usage.completion_tokens or 0, call_site=call_site)
+
+
+def _complete(messages, call_site: str) -> str:
+    with concurrency.llm_gate.slot(), metrics.track(_llm_duration, _llm_requests, call_site=call_site):
+        raw = _get_openai_client().chat.completions.with_raw_response.create(
+            model=CHAT_MODEL,
+            temperature=CHAT_TEMPERATURE,
+            messages=messages,
+        )
+        response = raw.parse()
+    _record_usage(call_site, response.usage, raw.retries_taken)
+    return response.choices[0].message.content or ""
+
+
+def _complete_and_cache(messages, cache_key: str, call_site: str) -> str:
+    content = _complete(messages, call_site)
+    if content.strip():
+        llm_cache.store(cache_key, content)
+    return content
 
 
-def _chat(messages):
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        temperature=0.4,
-        messages=messages,
+def _chat(messages, cacheable: bool = True, call_site: str = "chat"):
+    """
+    Run a chat completion. Identical prompts are answered from the shared response
+    cache, and concurrent identical prompts share one in-flight call, unless
+    `cacheable` is False (callers that want a fresh sample each time).
+    `call_site` labels the latency and token metrics.
+    """
+    if not cacheable:
+        return _complete(messages, call_site)
+
+    cache_key = llm_cache.make_key(CHAT_MODEL, CHAT_TEMPERATURE, messages)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        _llm_requests.inc(call_site=call_site, outcome="cache_hit")
+        return cached
+    return singleflight.do(
+        f"chat:{cache_key}", lambda: _complete_and_cache(messages, cache_key, call_site)
     )
-    return response.choices[0].message.content or ""
+
+
+def _chat_stream(messages, call_site: str = "chat_stream"):
+    """Yield content deltas of a chat completion as the API streams them (never cached)."""
+    with concurrency.llm_gate.slot(), metrics.track(_llm_duration, _llm_requests, call_site=call_site):
+        raw = _get_openai_client().chat.completions.with_raw_response.create(
+            model=CHAT_MODEL,
+            temperature=CHAT_TEMPERATURE,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        usage = None
+        for chunk in raw.parse():
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    _record_usage(call_site, usage, raw.retries_taken)
 
 
 def _translate(content: str, instruction: str) -> str:
@@ -27,7 +150,8 @@ def _translate(content: str, instruction: str) -> str:
         [
             {"role": "system", "content": instruction},
             {"role": "user", "content": content},
-        ]
+        ],
+        call_site="translation_fallback",
     )
 
 
@@ -48,6 +172,8 @@ def _load_google_credentials():
     2) GOOGLE_APPLICATION_CREDENTIALS (path to JSON file)
     3) project-local my-key.json (for Render deployments without env configuration)
     """
+    from google.oauth2 import service_account
+
     json_blob = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS_JSON")
     if json_blob:
         try:
@@ -76,12 +202,30 @@ def _load_google_credentials():
     return None
 
 
+def _get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        if fake_backends.enabled("llm"):
+            _openai_client = fake_backends.FakeOpenAI()
+        else:
+            # The SDK is slow to import, so workers only pay for it on first use.
+            from openai import OpenAI
+
+            _openai_client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    return _openai_client
+
+
 def _get_translate_client():
     global _translate_client
     if _translate_client is None:
+        if fake_backends.enabled("translate"):
+            _translate_client = fake_backends.FakeTranslateClient()
+            return _translate_client
         credentials = _load_google_credentials()
         if credentials is None:
             return None
+        from google.cloud import translate_v2 as translate
+
         _translate_client = translate.Client(credentials=credentials)
     return _translate_client
 
@@ -101,34 +245,241 @@ def _llm_translation_instruction(target_language: str) -> str:
     return f"Translate the following text into {target or 'the target language'}. Respond with the translation only."
 
 
-def translate_google(content: str, target_language: str) -> str:
-    trimmed = (content or "").strip()
-    if not trimmed:
-        return ""
+def _remembered_translation(content: str, target_language: str):
+    try:
+        return translation_memory.lookup(content, target_language)
+    except Exception:
+        logger.exception("Translation memory lookup failed.")
+        return None
 
-    client = _get_translate_client()
+
+def _remember_translation(content: str, target_language: str, translated: str, backend: str) -> None:
+    try:
+        translation_memory.record(content, target_language, translated, backend)
+    except Exception:
+        logger.exception("Translation memory write failed.")
+
+
+def _google_translate_text(client, content: str, target_language: str) -> str:
+    _translate_characters.inc(len(content), call_site="translate")
+    with metrics.track(_translate_duration, _translate_requests, call_site="translate"):
+        result = client.translate(content, target_language=target_language, format_="text")
+    translated = (result.get("translatedText") or "").strip()
+    if not translated:
+        raise RuntimeError("Translation service returned an empty result.")
+    return translated
+
+
+def _llm_translate_text(content: str, target_language: str) -> str:
+    translated = _translate(content, _llm_translation_instruction(target_language)).strip()
+    if not translated:
+        raise RuntimeError("Translation service returned an empty result.")
+    return translated
+
+
+def _hedge_delay() -> float:
+    observed = google_translate_breaker.latency_percentile(TRANSLATE_HEDGE_PERCENTILE)
+    budget = google_translate_breaker.latency_budget
+    return min(observed, budget) if observed is not None else budget
+
+
+def _translate_with_backends(content: str, target_language: str):
+    """
+    Return (backend, translation). Google Translate is tried first within its
+    latency budget; in hedged mode the LLM fallback also starts once Google is
+    slower than its recent TRANSLATE_HEDGE_PERCENTILE latency, and the first
+    answer wins.
+    """
+    futures = {}
     translate_error = None
+    started = {}
 
+    client = _get_translate_client()
     if client is not None:
         try:
-            result = client.translate(
-                trimmed, target_language=target_language, format_="text"
+            futures["google"] = google_translate_breaker.submit(
+                _google_translate_text, client, content, target_language
             )
-            translated = (result.get("translatedText") or "").strip()
-            if translated:
-                return translated
-            raise RuntimeError("Translation service returned an empty result.")
+            started["google"] = time.monotonic()
+        except resilience.CircuitOpenError as exc:
+            translate_error = exc
+
+    if "google" in futures:
+        wait_for = _hedge_delay() if TRANSLATE_HEDGE else google_translate_breaker.latency_budget
+        try:
+            return "google", futures["google"].result(timeout=wait_for)
+        except FutureTimeoutError as exc:
+            translate_error = TimeoutError("Google Translate exceeded its latency budget.")
+            translate_error.__cause__ = exc
+            if not TRANSLATE_HEDGE:
+                # Tell the breaker now: a hung call might not return for a long time, if ever.
+                google_translate_breaker.abandon(futures.pop("google"))
         except Exception as exc:  # pragma: no cover - external API failure
             translate_error = exc
+            del futures["google"]
+
+    # Fall back to the LLM if Google Translate is unavailable, slow or misconfigured.
+    try:
+        futures["llm"] = llm_translate_breaker.submit(_llm_translate_text, content, target_language)
+        started["llm"] = time.monotonic()
+    except resilience.CircuitOpenError as exc:
+        if not futures:
+            raise RuntimeError("Translation service unavailable.") from translate_error or exc
+    else:
+        # Only a fallback that actually started next to a running Google call is a hedge.
+        if "google" in futures:
+            _hedges_total.inc()
 
-    # Fall back to the LLM if Google Translate is unavailable or misconfigured.
     try:
-        translated_llm = _translate(trimmed, _llm_translation_instruction(target_language)).strip()
-        if not translated_llm:
-            raise RuntimeError("Translation service returned an empty result.")
-        return translated_llm
+        return resilience.first_result(futures, timeout=llm_translate_breaker.latency_budget)
     except Exception as exc:  # pragma: no cover - external API failure
         raise RuntimeError("Translation service unavailable.") from translate_error or exc
+    finally:
+        # Calls still running past their budget are failures now, even if they never return.
+        for name, breaker in (("google", google_translate_breaker), ("llm", llm_translate_breaker)):
+            future = futures.get(name)
+            if future is not None and not future.done() and time.monotonic() - started[name] >= breaker.latency_budget:
+                breaker.abandon(future)
+
+
+def translate_google(content: str, target_language: str) -> str:
+    trimmed = (content or "").strip()
+    if not trimmed:
+        return ""
+
+    remembered = _remembered_translation(trimmed, target_language)
+    if remembered:
+        return remembered
+
+    def _translate_and_remember():
+        backend, translated = _translate_with_backends(trimmed, target_language)
+        _remember_translation(trimmed, target_language, translated, backend)
+        return translated
+
+    normalized = translation_memory.normalize_text(trimmed)
+    flight_key = hashlib.sha256(f"{target_language}:{normalized}".encode("utf-8")).hexdigest()
+    return singleflight.do(f"translate:{flight_key}", _translate_and_remember)
+
+
+def _google_translate_many(client, texts, target_language: str) -> list:
+    translated = []
+    for start in range(0, len(texts), GOOGLE_TRANSLATE_BATCH_SIZE):
+        chunk = texts[start : start + GOOGLE_TRANSLATE_BATCH_SIZE]
+        _translate_characters.inc(sum(len(text) for text in chunk), call_site="translate_batch")
+        with metrics.track(_translate_duration, _translate_requests, call_site="translate_batch"):
+            results = client.translate(chunk, target_language=target_language, format_="text")
+        if isinstance(results, dict):
+            results = [results]
+        if len(results) != len(chunk):
+            raise RuntimeError("Translation service returned an incomplete batch.")
+        for result in results:
+            text = (result.get("translatedText") or "").strip()
+            if not text:
+                raise RuntimeError("Translation service returned an empty result.")
+            translated.append(text)
+    return translated
+
+
+def _llm_translate_many(texts, target_language: str) -> list:
+    instruction = (
+        _llm_translation_instruction(target_language)
+        + ' You receive JSON of the shape {"texts": [...]}. Translate every item independently and '
+        'respond with JSON only, shaped {"translations": [...]}, with exactly one translation per '
+        "input item, in the same order."
+    )
+    translated = []
+    for start in range(0, len(texts), LLM_TRANSLATE_BATCH_SIZE):
+        chunk = texts[start : start + LLM_TRANSLATE_BATCH_SIZE]
+        response_text = _chat(
+            [
+                {"role": "system", "content": instruction},
+                {"role": "user", "content": json.dumps({"texts": chunk}, ensure_ascii=False)},
+            ],
+            call_site="translation_fallback_batch",
+        )
+        try:
+            data = _extract_json_object(response_text)
+        except json.JSONDecodeError as exc:
+            raise ValueError("The AI response could not be parsed.") from exc
+
+        items = data.get("translations") if isinstance(data, dict) else None
+        if not isinstance(items, list) or len(items) != len(chunk):
+            raise ValueError("The AI response did not include one translation per text.")
+        for item in items:
+            text = str(item or "").strip()
+            if not text:
+                raise RuntimeError("Translation service returned an empty result.")
+            translated.append(text)
+    return translated
+
+
+def translate_google_batch(contents, target_language: str) -> list:
+    """
+    Translate many strings at once, returning translations in input order.
+
+    Inputs are de-duplicated on their normalized form and checked against the
+    translation memory; the rest go to Google Translate as list calls, or to the
+    LLM as JSON-structured prompts when Google is unavailable.
+    """
+    trimmed = [(content or "").strip() for content in contents or []]
+
+    pending = {}
+    for text in trimmed:
+        key = translation_memory.normalize_text(text)
+        if key and key not in pending:
+            pending[key] = text
+    if not pending:
+        return ["" for _ in trimmed]
+
+    try:
+        resolved = translation_memory.lookup_many(pending.values(), target_language)
+    except Exception:
+        logger.exception("Translation memory lookup failed.")
+        resolved = {}
+
+    missing_keys = [key for key in pending if key not in resolved]
+    missing_texts = [pending[key] for key in missing_keys]
+
+    if missing_texts:
+        backend = None
+        translated = None
+        translate_error = None
+        client = _get_translate_client()
+        if client is not None:
+            calls = math.ceil(len(missing_texts) / GOOGLE_TRANSLATE_BATCH_SIZE)
+            try:
+                translated = google_translate_breaker.call(
+                    _google_translate_many,
+                    client,
+                    missing_texts,
+                    target_language,
+                    budget=google_translate_breaker.latency_budget * calls,
+                )
+                backend = "google"
+            except Exception as exc:  # pragma: no cover - external API failure
+                translate_error = exc
+
+        if translated is None:
+            # Fall back to the LLM if Google Translate is unavailable or misconfigured.
+            calls = math.ceil(len(missing_texts) / LLM_TRANSLATE_BATCH_SIZE)
+            try:
+                translated = llm_translate_breaker.call(
+                    _llm_translate_many,
+                    missing_texts,
+                    target_language,
+                    budget=llm_translate_breaker.latency_budget * calls,
+                )
+                backend = "llm"
+            except Exception as exc:  # pragma: no cover - external API failure
+                raise RuntimeError("Translation service unavailable.") from translate_error or exc
+
+        resolved.update(zip(missing_keys, translated))
+        try:
+            translation_memory.record_many(zip(missing_texts, translated), target_language, backend)
+        except Exception:
+            logger.exception("Translation memory write failed.")
+
+    return [resolved.get(translation_memory.normalize_text(text), "") for text in trimmed]
 
 
 def _extract_json_object(raw_text: str):
@@ -151,10 +502,11 @@ def _extract_json_object(raw_text: str):
         raise
 
 
-def generate_ai_practise_cards(target_text: str, target_translation: str):
+def generate_ai_practise_cards(target_text: str, target_translation: str, fresh: bool = False):
     """
     Ask the LLM for three new words or phrases that match the part-of-speech
-    profile of the provided entry.
+    profile of the provided entry. Pass `fresh=True` to bypass the response cache
+    and get a new set rather than the last one generated for this entry.
     """
 
     system_prompt = (
@@ -185,7 +537,9 @@ def generate_ai_practise_cards(target_text: str, target_translation: str):
         [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
-        ]
+        ],
+        cacheable=not fresh,
+        call_site="ai_practise_cards",
     )
 
     try:
@@ -216,12 +570,7 @@ def generate_ai_practise_cards(target_text: str, target_translation: str):
     }
 
 
-def generate_usage_example(target_text: str, target_translation: str, extra_instruction: str = "") -> str:
-    """
-    Return a medium-length Danish sentence or brief two-line dialogue that uses the
-    target Danish word or phrase naturally with the same meaning as the provided English.
-    """
-
+def _usage_example_prompts(target_text: str, target_translation: str, extra_instruction: str, output_rule: str):
     target_clean = (target_text or "").strip()
     translation_clean = (target_translation or "").strip()
     if not target_clean or not translation_clean:
@@ -233,7 +582,7 @@ def generate_usage_example(target_text: str, target_translation: str, extra_inst
         "the meaning of the supplied English translation (do not substitute a different sense; keep the same meaning). "
         "Keep it under 35 words. "
         "You may use a short two-line dialogue if it feels natural. "
-        "Do not prepend explanations or quotes. Output Danish only."
+        + output_rule
     )
     if extra_instruction:
         system_prompt += " " + extra_instruction.strip()
@@ -245,12 +594,68 @@ def generate_usage_example(target_text: str, target_translation: str, extra_inst
         "the Danish target exactly as provided. Keep the tone everyday and concise."
     ).format(target=target_clean, translation=translation_clean)
 
-    return _chat(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-    ).strip()
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def generate_usage_example(target_text: str, target_translation: str, extra_instruction: str = "") -> str:
+    """
+    Return a medium-length Danish sentence or brief two-line dialogue that uses the
+    target Danish word or phrase naturally with the same meaning as the provided English.
+    """
+
+    messages = _usage_example_prompts(
+        target_text,
+        target_translation,
+        extra_instruction,
+        "Do not prepend explanations or quotes. Output Danish only.",
+    )
+
+    # Callers ask for new examples on purpose, so never replay a cached sentence.
+    return _chat(messages, cacheable=False, call_site="usage_example").strip()
+
+
+def generate_usage_example_with_translation(
+    target_text: str, target_translation: str, extra_instruction: str = ""
+) -> dict:
+    """
+    Return a Danish usage example and its natural English translation from a
+    single structured response, instead of one call per language.
+    """
+
+    messages = _usage_example_prompts(
+        target_text,
+        target_translation,
+        extra_instruction,
+        "Also translate your example into natural English, keeping the meaning and tone. "
+        'Respond with JSON only, shaped {"danish": "...", "english": "..."}, without explanations.',
+    )
+
+    try:
+        data = _extract_json_object(_chat(messages, cacheable=False, call_site="usage_example_pair"))
+    except json.JSONDecodeError as exc:
+        raise ValueError("The AI response could not be parsed.") from exc
+
+    if not isinstance(data, dict):
+        raise ValueError("The AI response could not be parsed.")
+    danish = str(data.get("danish") or "").strip()
+    english = str(data.get("english") or "").strip()
+    if not danish or not english:
+        raise ValueError("The AI response did not include both languages.")
+    return {"danish": danish, "english": english}
+
+
+def _example_translation_messages(example_danish: str):
+    translation_prompt = (
+        "You are a precise translator. Convert the Danish example into natural English. "
+        "Keep the meaning and tone, and avoid adding explanations."
+    )
+    return [
+        {"role": "system", "content": translation_prompt},
+        {"role": "user", "content": example_danish},
+    ]
 
 
 def translate_example_to_english(example_danish: str) -> str:
@@ -259,26 +664,32 @@ def translate_example_to_english(example_danish: str) -> str:
     if not clean:
         return ""
 
-    translation_prompt = (
-        "You are a precise translator. Convert the Danish example into natural English. "
-        "Keep the meaning and tone, and avoid adding explanations."
-    )
+    return _chat(_example_translation_messages(clean), call_site="example_translation").strip()
 
-    return _chat(
-        [
-            {"role": "system", "content": translation_prompt},
-            {"role": "user", "content": clean},
-        ]
-    ).strip()
+
+def _avoid_examples_instruction(avoid_examples) -> str:
+    avoid_list = [ex for ex in avoid_examples or [] if ex]
+    if not avoid_list:
+        return ""
+    avoid_block = "; ".join(avoid_list[:10])
+    return f"Do NOT repeat or paraphrase any of these prior Danish examples: {avoid_block}."
 
 
 def generate_usage_example_pair(target_text: str, target_translation: str, avoid_examples=None) -> dict:
     """Generate a Danish example and its English translation."""
-    avoid_list = [ex for ex in avoid_examples or [] if ex]
-    extra_instruction = ""
-    if avoid_list:
-        avoid_block = "; ".join(avoid_list[:10])
-        extra_instruction = f"Do NOT repeat or paraphrase any of these prior Danish examples: {avoid_block}."
+    extra_instruction = _avoid_examples_instruction(avoid_examples)
+
+    if EXAMPLE_PAIR_MODE != "two_step":
+        try:
+            return generate_usage_example_with_translation(
+                target_text,
+                target_translation,
+                extra_instruction=extra_instruction,
+            )
+        except ValueError:
+            if not (target_text or "").strip() or not (target_translation or "").strip():
+                raise
+            logger.warning("Combined example generation failed; falling back to two calls.")
 
     example_da = generate_usage_example(
         target_text,
@@ -287,3 +698,30 @@ def generate_usage_example_pair(target_text: str, target_translation: str, avoid
     )
     example_en = translate_example_to_english(example_da)
     return {"danish": example_da, "english": example_en}
+
+
+def stream_usage_example_pair(target_text: str, target_translation: str, avoid_examples=None):
+    """
+    Stream a Danish example and then its English translation, yielding
+    ("danish", delta) and ("english", delta) pieces as the model produces them.
+    """
+    messages = _usage_example_prompts(
+        target_text,
+        target_translation,
+        _avoid_examples_instruction(avoid_examples),
+        "Do not prepend explanations or quotes. Output Danish only.",
+    )
+
+    danish_parts = []
+    for delta in _chat_stream(messages, call_site="usage_example_stream"):
+        danish_parts.append(delta)
+        yield "danish", delta
+
+    example_danish = "".join(danish_parts).strip()
+    if not example_danish:
+        raise ValueError("The language model returned an empty response.")
+
+    for delta in _chat_stream(
+        _example_translation_messages(example_danish), call_site="example_translation_stream"
+    ):
+        yield "english", delta
@@ -0,0 +1,182 @@
+"""Content-addressed cache for chat completions, shared by all workers on the box."""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from . import local_store, metrics
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE", "sqlite").strip().lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# Eviction is a full-table statement, so only run it every N writes.
+_EVICT_EVERY_WRITES = 100
+
+_requests_total = metrics.counter("llm_cache_requests_total", "Chat completion cache lookups by result.")
+_entries = metrics.gauge("llm_cache_entries", "Chat completions currently stored in the shared cache.")
+_stored_hits = metrics.gauge(
+    "llm_cache_stored_hits", "Hits served from the shared cache across all workers for live entries."
+)
+
+
+def _normalize_content(content) -> str:
+    text = str(content or "").replace("\r\n", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+
+def make_key(model: str, temperature: float, messages) -> str:
+    """Hash the model, temperature and normalized message list into a cache key."""
+    normalized = [
+        {
+            "role": (message.get("role") or "").strip().lower(),
+            "content": _normalize_content(message.get("content")),
+        }
+        for message in messages or []
+    ]
+    payload = json.dumps(
+        {"model": model, "temperature": round(float(temperature), 4), "messages": normalized},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache interface; the base implementation stores nothing."""
+
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        return None
+
+    def stats(self) -> dict:
+        return {"entries": 0, "stored_hits": 0}
+
+
+class SQLiteResponseCache(ResponseCache):
+    """SQLite-backed cache with a TTL, an entry cap and least-recently-used eviction."""
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+        self._ready = False
+
+    def _conn(self):
+        conn = local_store.connect(self.path)
+        if not self._ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+                "last_used_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used_at ON llm_cache (last_used_at)")
+            self._ready = True
+        return conn
+
+    def get(self, key: str):
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        conn.execute(
+            "UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+            (now, key),
+        )
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used_at, hits) "
+            "VALUES (?, ?, ?, ?, 0)",
+            (key, value, now, now),
+        )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY_WRITES == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        conn = self._conn()
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        if self.max_entries > 0:
+            (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_used_at ASC LIMIT ?)",
+                    (excess,),
+                )
+
+    def stats(self) -> dict:
+        entries, stored_hits = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_cache"
+        ).fetchone()
+        return {"entries": entries, "stored_hits": stored_hits}
+
+
+def _default_cache() -> ResponseCache:
+    if LLM_CACHE_BACKEND in ("", "off", "none", "0", "false"):
+        return ResponseCache()
+    return SQLiteResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+
+
+_cache = _default_cache()
+
+
+def get_cache() -> ResponseCache:
+    return _cache
+
+
+def set_cache(cache: ResponseCache) -> None:
+    """Swap the cache implementation (e.g. a shared store or `ResponseCache()` to disable)."""
+    global _cache
+    _cache = cache or ResponseCache()
+
+
+def lookup(key: str):
+    try:
+        value = _cache.get(key)
+    except Exception:
+        logger.exception("LLM cache lookup failed.")
+        value = None
+    _requests_total.inc(result="hit" if value is not None else "miss")
+    return value
+
+
+def store(key: str, value: str) -> None:
+    try:
+        _cache.set(key, value)
+    except Exception:
+        logger.exception("LLM cache write failed.")
+
+
+def _collect():
+    try:
+        stats = _cache.stats()
+    except Exception:
+        logger.exception("LLM cache stats failed.")
+        return
+    _entries.set(stats.get("entries", 0))
+    _stored_hits.set(stats.get("stored_hits", 0))
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,28 @@
+"""Process-shared SQLite files for caches and coordination state kept beside the app."""
+import os
+import sqlite3
+import threading
+
+_local = threading.local()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Return this thread's connection to the SQLite file at `path`.
+
+    The files are shared by every gunicorn worker on the box, so connections use
+    WAL journaling and a busy timeout instead of failing on concurrent writers.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[path] = conn
+    return conn
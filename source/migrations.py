@@ -0,0 +1,387 @@
+"""
+Numbered schema migrations, recorded in a schema_migrations table.
+
+Run them with `python scripts/migrate.py` (the Procfile release step). Workers
+compare the recorded version with the latest one at startup and, with
+AUTO_MIGRATE on (the default), apply pending migrations themselves; migrations
+run one at a time under an advisory lock, so concurrent workers are safe.
+
+A migration must not depend on what the models declare today: an old database
+replays every migration in order, so each one creates exactly the columns and
+indexes of its own time. Every table is created from frozen DDL and every index
+is named in the migration that adds it. `python scripts/check_migrations.py` upgrades pre-migration databases and
+compares them with a freshly migrated one.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from peewee import PostgresqlDatabase, chunked, fn
+
+from . import attempt_stats, entry_examples
+from .database import database
+from .dictionary_entry import DictionaryEntry
+from .distractor_stock import DistractorSet
+from .entry_examples import EntryExample
+from .example_buffer import BufferedExample
+from .exercise_log import ExerciseLog
+from .sync import EntryTombstone
+from .translation_memory import TranslationMemory
+from .user import User
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+# Arbitrary constant shared by every process that migrates this database.
+_ADVISORY_LOCK_ID = 7_420_017
+
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "on").strip().lower() not in (
+    "",
+    "off",
+    "0",
+    "false",
+    "no",
+)
+
+MIGRATIONS = []
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised at startup when the database is behind the code and AUTO_MIGRATE is off."""
+
+
+def migration(version: int, name: str):
+    """Register the decorated function(db) as migration number `version`."""
+
+    def register(fn):
+        if any(existing == version for existing, _, _ in MIGRATIONS):
+            raise ValueError(f"Duplicate migration number {version}.")
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return fn
+
+    return register
+
+
+def is_postgres(db) -> bool:
+    return isinstance(db, PostgresqlDatabase)
+
+
+def columns(db, table: str) -> set:
+    return {column.name for column in db.get_columns(table)}
+
+
+def add_column(db, table: str, column: str, definition: str, postgres_definition: str | None = None) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column exists; returns True if it was added."""
+    if column in columns(db, table):
+        return False
+    if is_postgres(db) and postgres_definition:
+        definition = postgres_definition
+    db.execute_sql(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {definition}')
+    return True
+
+
+def column_types(db) -> dict:
+    """Dialect types for the {primary_key}, {boolean} and {timestamp} placeholders in frozen DDL."""
+    if is_postgres(db):
+        return {"primary_key": "SERIAL NOT NULL PRIMARY KEY", "boolean": "BOOLEAN", "timestamp": "TIMESTAMP"}
+    return {"primary_key": "INTEGER NOT NULL PRIMARY KEY", "boolean": "INTEGER", "timestamp": "DATETIME"}
+
+
+def create_table(db, table: str, definition: str) -> None:
+    """CREATE TABLE IF NOT EXISTS from frozen column DDL; indexes are left to create_index."""
+    db.execute_sql(f'CREATE TABLE IF NOT EXISTS "{table}" ({definition.format(**column_types(db))})')
+
+
+def create_index(db, name: str, table: str, column_names, unique: bool = False) -> None:
+    quoted = ", ".join(f'"{column}"' for column in column_names)
+    db.execute_sql(
+        f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})'
+    )
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(db=database) -> int:
+    if not db.table_exists(MIGRATIONS_TABLE):
+        return 0
+    row = db.execute_sql(f'SELECT MAX("version") FROM "{MIGRATIONS_TABLE}"').fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def pending(db=database) -> list:
+    version = current_version(db)
+    return [(number, name) for number, name, _ in MIGRATIONS if number > version]
+
+
+@contextmanager
+def _advisory_lock(db):
+    if is_postgres(db):
+        db.execute_sql("SELECT pg_advisory_lock(%s)", (_ADVISORY_LOCK_ID,))
+        try:
+            yield
+        finally:
+            db.execute_sql("SELECT pg_advisory_unlock(%s)", (_ADVISORY_LOCK_ID,))
+        return
+
+    # SQLite has no advisory locks; serialize migrating processes on a lock file next to the database.
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(f"{db.database}.migrate.lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def migrate(db=database) -> list:
+    """Apply every pending migration in order under the advisory lock; returns the versions applied."""
+    applied = []
+    with _advisory_lock(db):
+        db.execute_sql(
+            f'CREATE TABLE IF NOT EXISTS "{MIGRATIONS_TABLE}" '
+            '("version" INTEGER PRIMARY KEY, "name" TEXT NOT NULL, "applied_at" TIMESTAMP NOT NULL)'
+        )
+        # Re-read under the lock: another process may have migrated while we waited.
+        version = current_version(db)
+        for number, name, fn in MIGRATIONS:
+            if number <= version:
+                continue
+            started = time.monotonic()
+            with db.atomic():
+                fn(db)
+                db.execute_sql(
+                    f'INSERT INTO "{MIGRATIONS_TABLE}" ("version", "name", "applied_at") '
+                    f"VALUES ({db.param}, {db.param}, {db.param})",
+                    (number, name, datetime.utcnow()),
+                )
+            logger.info("Applied migration %04d_%s in %.2fs.", number, name, time.monotonic() - started)
+            applied.append(number)
+    return applied
+
+
+def ensure_current(db=database) -> None:
+    """Startup check: one version query, migrating only if AUTO_MIGRATE allows it."""
+    version = current_version(db)
+    if version >= latest_version():
+        return
+    if not AUTO_MIGRATE:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version} but the app needs {latest_version()}. "
+            "Run `python scripts/migrate.py`."
+        )
+    migrate(db)
+
+
+# The schema as it stood when migrations were introduced. Frozen: change it in a new migration instead.
+_BASELINE_TABLES = (
+    (
+        "user",
+        '"id" {primary_key}, "username" VARCHAR(255) NOT NULL, "password_hash" VARCHAR(255) NOT NULL',
+    ),
+    (
+        "dictionaryentry",
+        '"id" {primary_key}, "user_id" INTEGER NOT NULL, "text" TEXT NOT NULL, "translation" TEXT, "notes" TEXT, '
+        '"is_external_input" {boolean} NOT NULL, "created_at" {timestamp}, "last_seen_at" {timestamp}, '
+        '"probability_score" REAL NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE',
+    ),
+    (
+        "dailyexercisetotal",
+        '"id" {primary_key}, "user_id" INTEGER NOT NULL, "day" DATE NOT NULL, "count" INTEGER NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE',
+    ),
+    (
+        "exerciselog",
+        '"id" {primary_key}, "user_id" INTEGER NOT NULL, "entry_id" INTEGER, "kind" VARCHAR(255) NOT NULL, '
+        '"created_at" {timestamp}, "attempt_score" INTEGER NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE, '
+        'FOREIGN KEY ("entry_id") REFERENCES "dictionaryentry" ("id") ON DELETE SET NULL',
+    ),
+)
+_BASELINE_INDEXES = (
+    ("user_username", "user", ["username"], True),
+    ("dictionaryentry_user_id", "dictionaryentry", ["user_id"], False),
+    ("dailyexercisetotal_user_id", "dailyexercisetotal", ["user_id"], False),
+    ("dailyexercisetotal_user_id_day", "dailyexercisetotal", ["user_id", "day"], True),
+    ("exerciselog_user_id", "exerciselog", ["user_id"], False),
+    ("exerciselog_entry_id", "exerciselog", ["entry_id"], False),
+)
+
+
+@migration(1, "baseline")
+def _baseline(db):
+    # Databases created before these columns existed, previously patched on every boot.
+    if db.table_exists("dictionaryentry"):
+        if "user_id" not in columns(db, "dictionaryentry"):
+            db.execute_sql('DROP TABLE "dictionaryentry"')
+        else:
+            add_column(db, "dictionaryentry", "is_external_input", "INTEGER NOT NULL DEFAULT 1", "BOOLEAN NOT NULL DEFAULT TRUE")
+            if add_column(db, "dictionaryentry", "created_at", "TIMESTAMP", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"):
+                db.execute_sql('UPDATE "dictionaryentry" SET "created_at" = CURRENT_TIMESTAMP WHERE "created_at" IS NULL')
+            add_column(db, "dictionaryentry", "last_seen_at", "TIMESTAMP")
+            add_column(db, "dictionaryentry", "probability_score", "REAL NOT NULL DEFAULT 0.8", "DOUBLE PRECISION NOT NULL DEFAULT 0.8")
+
+    for table, definition in _BASELINE_TABLES:
+        create_table(db, table, definition)
+
+    db.execute_sql(
+        'UPDATE "dictionaryentry" SET "probability_score" = 0.8 '
+        'WHERE "probability_score" IS NULL OR "probability_score" <= 0'
+    )
+    add_column(db, "exerciselog", "attempt_score", "INTEGER NOT NULL DEFAULT 1")
+    add_column(db, "exerciselog", "entry_id", "INTEGER")
+
+    # After the column patches, so every indexed column exists.
+    for name, table, column_names, unique in _BASELINE_INDEXES:
+        create_index(db, name, table, column_names, unique=unique)
+
+
+@migration(2, "translation_memory")
+def _translation_memory(db):
+    table_name = TranslationMemory._meta.table_name
+    create_table(
+        db,
+        table_name,
+        '"id" {primary_key}, "source_hash" VARCHAR(64) NOT NULL, "target_language" VARCHAR(16) NOT NULL, '
+        '"source_text" TEXT NOT NULL, "translation" TEXT NOT NULL, "backend" VARCHAR(16) NOT NULL, '
+        '"created_at" {timestamp} NOT NULL, "last_used_at" {timestamp} NOT NULL, "hit_count" INTEGER NOT NULL',
+    )
+    create_index(
+        db, "translationmemory_source_hash_target_language", table_name, ["source_hash", "target_language"], unique=True
+    )
+    create_index(db, "translationmemory_last_used_at", table_name, ["last_used_at"])
+
+
+@migration(3, "distractor_stock")
+def _distractor_stock(db):
+    table_name = DistractorSet._meta.table_name
+    create_table(
+        db,
+        table_name,
+        '"id" {primary_key}, "entry_id" INTEGER NOT NULL, "target_text" TEXT NOT NULL, '
+        '"target_translation" TEXT NOT NULL, "part_of_speech" VARCHAR(255) NOT NULL, "distractors" TEXT NOT NULL, '
+        '"created_at" {timestamp} NOT NULL, '
+        'FOREIGN KEY ("entry_id") REFERENCES "dictionaryentry" ("id") ON DELETE CASCADE',
+    )
+    create_index(db, "distractorset_entry_id", table_name, ["entry_id"])
+    create_index(db, "distractorset_entry_id_created_at", table_name, ["entry_id", "created_at"])
+
+
+@migration(4, "example_buffer")
+def _example_buffer(db):
+    table_name = BufferedExample._meta.table_name
+    create_table(
+        db,
+        table_name,
+        '"id" {primary_key}, "entry_id" INTEGER NOT NULL, "target_translation" TEXT NOT NULL, '
+        '"danish" TEXT NOT NULL, "english" TEXT NOT NULL, "created_at" {timestamp} NOT NULL, '
+        'FOREIGN KEY ("entry_id") REFERENCES "dictionaryentry" ("id") ON DELETE CASCADE',
+    )
+    create_index(db, "bufferedexample_entry_id", table_name, ["entry_id"])
+    create_index(db, "bufferedexample_entry_id_created_at", table_name, ["entry_id", "created_at"])
+
+
+@migration(5, "hot_query_indexes")
+def _hot_query_indexes(db):
+    create_index(db, "exerciselog_user_id_entry_id", ExerciseLog._meta.table_name, ["user_id", "entry_id"])
+    create_index(db, "dictionaryentry_user_id_id", DictionaryEntry._meta.table_name, ["user_id", "id"])
+    create_index(db, "dictionaryentry_user_id_created_at", DictionaryEntry._meta.table_name, ["user_id", "created_at"])
+
+
+@migration(6, "entry_attempt_stats")
+def _entry_attempt_stats(db):
+    table_name = DictionaryEntry._meta.table_name
+    add_column(db, table_name, "attempt_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column(db, table_name, "attempt_score_sum", "INTEGER NOT NULL DEFAULT 0")
+    add_column(db, table_name, "last_attempt_at", "TIMESTAMP")
+    attempt_stats.backfill(db=db)
+
+
+@migration(7, "entry_examples")
+def _entry_examples(db):
+    example_table_name = EntryExample._meta.table_name
+    create_table(
+        db,
+        example_table_name,
+        '"id" {primary_key}, "entry_id" INTEGER NOT NULL, "danish" TEXT NOT NULL, "english" TEXT NOT NULL, '
+        '"created_at" {timestamp} NOT NULL, '
+        'FOREIGN KEY ("entry_id") REFERENCES "dictionaryentry" ("id") ON DELETE CASCADE',
+    )
+    create_index(db, "entryexample_entry_id", example_table_name, ["entry_id"])
+    create_index(db, "entryexample_entry_id_id", example_table_name, ["entry_id", "id"])
+
+    # Move the JSON examples blobs out of DictionaryEntry.notes, clearing each converted one.
+    last_id = 0
+    while True:
+        batch = list(
+            DictionaryEntry.select(DictionaryEntry.id, DictionaryEntry.notes)
+            .where((DictionaryEntry.id > last_id) & DictionaryEntry.notes.is_null(False) & (DictionaryEntry.notes != ""))
+            .order_by(DictionaryEntry.id)
+            .limit(500)
+        )
+        if not batch:
+            break
+        now = datetime.utcnow()
+        rows, converted = [], []
+        for entry in batch:
+            examples = entry_examples.load_examples_from_notes(entry.notes)
+            if examples:
+                converted.append(entry.id)
+                rows.extend((entry.id, example["danish"], example["english"], now) for example in examples)
+        # Explicit columns: insert_many would also fill in defaults for fields added after this migration.
+        for chunk in chunked(rows, 100):
+            db.execute_sql(
+                f'INSERT INTO "{example_table_name}" ("entry_id", "danish", "english", "created_at") VALUES '
+                + ", ".join([f"({db.param}, {db.param}, {db.param}, {db.param})"] * len(chunk)),
+                [value for row in chunk for value in row],
+            )
+        if converted:
+            DictionaryEntry.update(notes="").where(DictionaryEntry.id.in_(converted)).execute()
+        last_id = batch[-1].id
+
+
+@migration(8, "entry_sync")
+def _entry_sync(db):
+    table_name = DictionaryEntry._meta.table_name
+    user_table_name = User._meta.table_name
+    add_column(db, table_name, "updated_at", "TIMESTAMP")
+    add_column(db, table_name, "change_seq", "INTEGER NOT NULL DEFAULT 0")
+    add_column(db, user_table_name, "change_seq", "INTEGER NOT NULL DEFAULT 0")
+    create_index(db, "dictionaryentry_user_id_change_seq", table_name, ["user_id", "change_seq"])
+    tombstone_table_name = EntryTombstone._meta.table_name
+    create_table(
+        db,
+        tombstone_table_name,
+        '"id" {primary_key}, "user_id" INTEGER NOT NULL, "entry_id" INTEGER NOT NULL, '
+        '"change_seq" INTEGER NOT NULL, "deleted_at" {timestamp} NOT NULL, '
+        'FOREIGN KEY ("user_id") REFERENCES "user" ("id") ON DELETE CASCADE',
+    )
+    create_index(db, "entrytombstone_user_id", tombstone_table_name, ["user_id"])
+    create_index(db, "entrytombstone_user_id_change_seq", tombstone_table_name, ["user_id", "change_seq"])
+
+    # Existing entries all become change 1, so a first sync (since=0) returns them.
+    DictionaryEntry.update(
+        change_seq=1,
+        updated_at=fn.COALESCE(DictionaryEntry.last_attempt_at, DictionaryEntry.created_at),
+    ).where(DictionaryEntry.change_seq == 0).execute()
+    User.update(change_seq=1).where(User.change_seq == 0).execute()
+
+
+@migration(9, "translation_memory_exact_case")
+def _translation_memory_exact_case(db):
+    table_name = TranslationMemory._meta.table_name
+    # Databases created while migration 2 still followed the live model already have touch_count.
+    if "hit_count" in columns(db, table_name):
+        db.execute_sql(f'ALTER TABLE "{table_name}" RENAME COLUMN "hit_count" TO "touch_count"')
+    # Rows were keyed by casefolded text and may serve one case's translation for another; it is only a cache.
+    db.execute_sql(f'DELETE FROM "{table_name}"')
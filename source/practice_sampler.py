@@ -0,0 +1,228 @@
+"""
+Weighted choice of the next entry to practise, drawn in O(log n) from a
+per-user Fenwick tree over probability scores.
+
+Each worker caches one sampler per user and brings it up to date from the
+entries and tombstones stamped after the change sequence it last saw, so
+workers never need to tell each other about score changes.
+"""
+import os
+import random
+import threading
+from collections import OrderedDict
+
+from .dictionary_entry import DictionaryEntry
+from .sync import EntryTombstone, current_seq
+
+PRACTICE_SAMPLER_MAX_USERS = int(os.getenv("PRACTICE_SAMPLER_MAX_USERS", "1000"))
+
+# Same floor and default as the scores stored on entries, so no entry is ever unreachable.
+MIN_WEIGHT = 0.01
+DEFAULT_WEIGHT = 0.8
+
+_MAX_UPDATES_BEFORE_REBUILD = 100_000
+
+_samplers = OrderedDict()
+_lock = threading.Lock()
+
+
+def _weight(probability_score) -> float:
+    try:
+        value = float(probability_score)
+    except (TypeError, ValueError):
+        value = DEFAULT_WEIGHT
+    if not value > 0:
+        value = DEFAULT_WEIGHT
+    return max(MIN_WEIGHT, value)
+
+
+class FenwickTree:
+    """Prefix sums over a growable list of non-negative weights (positions are 0-based)."""
+
+    def __init__(self, weights=()):
+        # Linear-time build: push each node's sum up to its parent once.
+        self._tree = [0.0] + [float(weight) for weight in weights]
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, weight: float) -> None:
+        # Node i covers (i - lowbit(i), i]; fill it from the prefix sums already in place.
+        i = len(self._tree)
+        lowbit = i & -i
+        self._tree.append(weight + self.prefix(i - 1) - self.prefix(i - lowbit))
+
+    def add(self, position: int, delta: float) -> None:
+        i = position + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count: int) -> float:
+        """Sum of the first `count` weights."""
+        total = 0.0
+        i = count
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> float:
+        return self.prefix(len(self))
+
+    def find(self, value: float) -> int:
+        """The position whose cumulative range contains `value`, for 0 <= value < total()."""
+        position = 0
+        step = 1 << (len(self).bit_length() - 1) if len(self) else 0
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] <= value:
+                position = nxt
+                value -= self._tree[nxt]
+            step >>= 1
+        return min(position, len(self) - 1)
+
+
+class Sampler:
+    """One user's entries and weights; removed entries keep their slot at weight 0 until a rebuild."""
+
+    def __init__(self, rows, seq: int):
+        self.seq = seq
+        self.lock = threading.Lock()
+        self._ids = []
+        self._weights = []
+        self._positions = {}
+        for entry_id, probability_score in rows:
+            self._ids.append(entry_id)
+            self._weights.append(_weight(probability_score))
+            self._positions[entry_id] = len(self._ids) - 1
+        self._tree = FenwickTree(self._weights)
+        self._removed = 0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def set(self, entry_id: int, probability_score) -> None:
+        weight = _weight(probability_score)
+        position = self._positions.get(entry_id)
+        if position is None:
+            self._ids.append(entry_id)
+            self._weights.append(weight)
+            self._positions[entry_id] = len(self._ids) - 1
+            self._tree.append(weight)
+            return
+        self._tree.add(position, weight - self._weights[position])
+        self._weights[position] = weight
+        self._updates += 1
+
+    def remove(self, entry_id: int) -> None:
+        position = self._positions.pop(entry_id, None)
+        if position is None:
+            return
+        self._tree.add(position, -self._weights[position])
+        self._weights[position] = 0.0
+        self._removed += 1
+
+    def needs_rebuild(self) -> bool:
+        # Reclaim slots once most are dead, and reset the rounding error that repeated adds accumulate.
+        return self._removed > len(self._positions) or self._updates > _MAX_UPDATES_BEFORE_REBUILD
+
+    def draw(self, exclude=None, rng=random):
+        """A weighted random entry id, never `exclude` unless it is the only entry; None when empty."""
+        if not self._positions:
+            return None
+        total = self._tree.total()
+        position = self._positions.get(exclude)
+        if position is None or len(self._positions) == 1:
+            return self._ids[self._live(self._tree.find(rng.random() * total))]
+
+        # Draw over the total without the excluded weight, then step over its slice of the range.
+        excluded = self._weights[position]
+        value = rng.random() * (total - excluded)
+        if value >= self._tree.prefix(position):
+            value += excluded
+        return self._ids[self._live(self._tree.find(value), skip=position)]
+
+    def _live(self, position: int, skip=None) -> int:
+        # Rounding can land a draw on a removed (zero-weight) or skipped slot at the edge of its range.
+        def usable(candidate):
+            return candidate != skip and self._weights[candidate] > 0
+
+        if usable(position):
+            return position
+        for candidate in range(position - 1, -1, -1):
+            if usable(candidate):
+                return candidate
+        return next(candidate for candidate in range(position + 1, len(self._weights)) if usable(candidate))
+
+
+def _build(user_id: int, seq: int) -> Sampler:
+    rows = (
+        DictionaryEntry.select(DictionaryEntry.id, DictionaryEntry.probability_score)
+        .where(DictionaryEntry.user == user_id)
+        .order_by(DictionaryEntry.id)
+        .tuples()
+    )
+    return Sampler(rows, seq)
+
+
+def _refresh(sampler: Sampler, user_id: int, seq: int) -> None:
+    # Anything stamped after `seq` is fetched again next time; applying it twice is harmless.
+    changed = (
+        DictionaryEntry.select(DictionaryEntry.change_seq, DictionaryEntry.id, DictionaryEntry.probability_score)
+        .where((DictionaryEntry.user == user_id) & (DictionaryEntry.change_seq > sampler.seq))
+        .tuples()
+    )
+    deleted = (
+        EntryTombstone.select(EntryTombstone.change_seq, EntryTombstone.entry_id)
+        .where((EntryTombstone.user == user_id) & (EntryTombstone.change_seq > sampler.seq))
+        .tuples()
+    )
+    # Apply in change order: SQLite can hand a deleted entry's id to the next new entry.
+    changes = [(change_seq, False, entry_id, score) for change_seq, entry_id, score in changed]
+    changes += [(change_seq, True, entry_id, None) for change_seq, entry_id in deleted]
+    for _, is_deleted, entry_id, probability_score in sorted(changes, key=lambda change: change[0]):
+        if is_deleted:
+            sampler.remove(entry_id)
+        else:
+            sampler.set(entry_id, probability_score)
+    sampler.seq = seq
+
+
+def sampler_for(user_id: int) -> Sampler:
+    """The user's sampler, brought up to date with their latest change sequence number."""
+    with _lock:
+        sampler = _samplers.get(user_id)
+
+    # Read the sequence first: changes stamped while we load are simply picked up next time.
+    seq = current_seq(user_id)
+    if sampler is None or seq < sampler.seq or sampler.needs_rebuild():
+        sampler = _build(user_id, seq)
+    elif seq != sampler.seq:
+        with sampler.lock:
+            if sampler.seq < seq:
+                _refresh(sampler, user_id, seq)
+
+    with _lock:
+        _samplers[user_id] = sampler
+        _samplers.move_to_end(user_id)
+        while len(_samplers) > PRACTICE_SAMPLER_MAX_USERS:
+            _samplers.popitem(last=False)
+    return sampler
+
+
+def draw(user_id: int, exclude=None):
+    sampler = sampler_for(user_id)
+    with sampler.lock:
+        return sampler.draw(exclude)
+
+
+def forget(user_id: int) -> None:
+    """Drop the cached sampler, e.g. when a drawn entry turns out to be gone."""
+    with _lock:
+        _samplers.pop(user_id, None)
@@ -0,0 +1,285 @@
+"""
+Practice selection probability for dictionary entries.
+
+`score` rates one entry when it is practised or seen. `recompute_all` re-rates
+every entry in bulk, since the recency and newness terms keep changing with the
+clock even for entries nobody touches; it runs from
+`scripts/recompute_probabilities.py` or, with PROBABILITY_RECOMPUTE_INTERVAL_SECONDS
+set, on a background thread.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+from peewee import PostgresqlDatabase, fn
+
+from . import attempt_stats
+from .database import database
+from .dictionary_entry import DictionaryEntry
+from .user import User
+
+logger = logging.getLogger(__name__)
+
+PROBABILITY_RECOMPUTE_INTERVAL_SECONDS = int(os.getenv("PROBABILITY_RECOMPUTE_INTERVAL_SECONDS", "0"))
+RECOMPUTE_BATCH_SIZE = 20000
+# Rows per bulk UPDATE statement.
+_WRITE_CHUNK = 1000
+# Arbitrary constant shared by every worker that may run the scheduled recompute.
+_ADVISORY_LOCK_ID = 7_420_025
+
+DEFAULT_ATTEMPT_SCORE = 2.0
+MIN_PROBABILITY = 0.15
+MAX_PROBABILITY = 0.99
+RECENCY_DAYS = 14.0
+NEWNESS_DAYS = 30.0
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def score(entry: DictionaryEntry, now: datetime | None = None) -> float:
+    now = now or datetime.now(UTC)
+    # Read from the entry's running totals rather than aggregating its ExerciseLog history.
+    avg_attempt_score = attempt_stats.average_attempt_score(entry)
+    avg_attempt_score = float(avg_attempt_score) if avg_attempt_score is not None else DEFAULT_ATTEMPT_SCORE
+    avg_attempt_score = _clamp(avg_attempt_score, 1.0, 4.0)
+
+    # Reverse average score so higher/worse attempts increase selection probability.
+    difficulty = (avg_attempt_score - 1.0) / 3.0
+
+    last_seen_at = _as_utc(getattr(entry, "last_seen_at", None))
+    if last_seen_at:
+        seen_gap_days = max((now - last_seen_at).total_seconds() / 86400.0, 0.0)
+        recency_boost = _clamp(seen_gap_days / RECENCY_DAYS, 0.0, 1.0)
+    else:
+        recency_boost = 1.0
+
+    created_at = _as_utc(getattr(entry, "created_at", None))
+    if created_at:
+        age_days = max((now - created_at).total_seconds() / 86400.0, 0.0)
+        newness_boost = 1.0 - _clamp(age_days / NEWNESS_DAYS, 0.0, 1.0)
+    else:
+        newness_boost = 1.0
+
+    # Keep current probabilities relatively high while still ranking by performance/recency/newness.
+    probability = 0.55 + (0.25 * difficulty) + (0.10 * recency_boost) + (0.10 * newness_boost)
+    probability = _clamp(probability, MIN_PROBABILITY, MAX_PROBABILITY)
+    return round(float(probability), 4)
+
+
+def score_many(attempt_count, attempt_score_sum, last_seen_days, age_days):
+    """`score` over NumPy arrays; the day arrays hold NaN where the timestamp is missing."""
+    import numpy as np
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_attempt_score = np.where(attempt_count > 0, attempt_score_sum / attempt_count, DEFAULT_ATTEMPT_SCORE)
+    difficulty = (np.clip(avg_attempt_score, 1.0, 4.0) - 1.0) / 3.0
+
+    recency_boost = np.where(
+        np.isnan(last_seen_days), 1.0, np.clip(np.maximum(last_seen_days, 0.0) / RECENCY_DAYS, 0.0, 1.0)
+    )
+    newness_boost = np.where(
+        np.isnan(age_days), 1.0, 1.0 - np.clip(np.maximum(age_days, 0.0) / NEWNESS_DAYS, 0.0, 1.0)
+    )
+
+    probability = 0.55 + (0.25 * difficulty) + (0.10 * recency_boost) + (0.10 * newness_boost)
+    return np.round(np.clip(probability, MIN_PROBABILITY, MAX_PROBABILITY), 4)
+
+
+def _epoch_seconds(field, db):
+    """SQL for a timestamp column as Unix seconds (NULL stays NULL), so rows arrive as plain floats."""
+    if isinstance(db, PostgresqlDatabase):
+        return fn.date_part("epoch", field)
+    return (fn.julianday(field) - 2440587.5) * 86400.0
+
+
+def _reserve_seqs(user_id: int, count: int) -> int:
+    """Take `count` change sequence numbers for the user at once; returns the first."""
+    User.update(change_seq=User.change_seq + count).where(User.id == user_id).execute()
+    return User.select(User.change_seq).where(User.id == user_id).scalar() - count + 1
+
+
+def _write(np, ids, user_ids, scores, read_seqs, db) -> int:
+    """
+    Write the new scores, stamping each entry with its own fresh change sequence
+    number. Entries whose change_seq moved on since the batch was read were
+    re-scored by a request in the meantime and are left alone. Returns the
+    number of entries written.
+    """
+    order = np.argsort(user_ids, kind="stable")
+    ids, user_ids, scores, read_seqs = ids[order], user_ids[order], scores[order], read_seqs[order]
+    seqs = np.empty(len(ids), dtype=np.int64)
+
+    now = datetime.utcnow()
+    table = DictionaryEntry._meta.table_name
+    written = 0
+    with db.atomic():
+        # Sequence numbers stay unique per entry, so /sync can page through them.
+        users, starts, counts = np.unique(user_ids, return_index=True, return_counts=True)
+        for user_id, start, count in zip(users.tolist(), starts.tolist(), counts.tolist()):
+            first_seq = _reserve_seqs(user_id, count)
+            seqs[start : start + count] = np.arange(first_seq, first_seq + count)
+
+        # A skipped entry just leaves a gap in its user's sequence, which /sync does not mind.
+        rows = list(zip(scores.tolist(), seqs.tolist(), ids.tolist(), read_seqs.tolist()))
+        for start in range(0, len(rows), _WRITE_CHUNK):
+            chunk = rows[start : start + _WRITE_CHUNK]
+            if isinstance(db, PostgresqlDatabase):
+                values = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+                cursor = db.execute_sql(
+                    f'UPDATE "{table}" AS e SET "probability_score" = v.p, "change_seq" = v.s, "updated_at" = %s '
+                    f"FROM (VALUES {values}) AS v(p, s, id, read_seq) "
+                    "WHERE e.id = v.id AND e.change_seq = v.read_seq",
+                    [now] + [value for row in chunk for value in row],
+                )
+            else:
+                # sqlite3 reuses one prepared statement across executemany.
+                cursor = db.cursor()
+                cursor.executemany(
+                    f'UPDATE "{table}" SET "probability_score" = ?, "change_seq" = ?, "updated_at" = ? '
+                    'WHERE "id" = ? AND "change_seq" = ?',
+                    [(p, seq, now, entry_id, read_seq) for p, seq, entry_id, read_seq in chunk],
+                )
+            written += cursor.rowcount
+    return written
+
+
+def recompute_all(
+    batch_size: int = RECOMPUTE_BATCH_SIZE, user_id: int | None = None, dry_run: bool = False, db=database
+) -> dict:
+    """
+    Re-score every entry (or one user's) in id-keyed batches and write back only
+    the scores that changed. Returns counts and timings for reporting.
+    """
+    import numpy as np
+
+    now = datetime.now(UTC).timestamp()
+    totals = {"scanned": 0, "updated": 0, "fetch_seconds": 0.0, "compute_seconds": 0.0, "write_seconds": 0.0}
+    started = time.monotonic()
+    last_id = 0
+    while True:
+        fetch_started = time.monotonic()
+        query = DictionaryEntry.select(
+            DictionaryEntry.id,
+            DictionaryEntry.user,
+            DictionaryEntry.attempt_count,
+            DictionaryEntry.attempt_score_sum,
+            _epoch_seconds(DictionaryEntry.last_seen_at, db),
+            _epoch_seconds(DictionaryEntry.created_at, db),
+            DictionaryEntry.probability_score,
+            DictionaryEntry.change_seq,
+        ).where(DictionaryEntry.id > last_id)
+        if user_id is not None:
+            query = query.where(DictionaryEntry.user == user_id)
+        # Raw cursor rows go straight into one float array; NULLs become NaN.
+        rows = db.execute(query.order_by(DictionaryEntry.id).limit(batch_size)).fetchall()
+        if not rows:
+            break
+        data = np.array(rows, dtype=float)
+        totals["fetch_seconds"] += time.monotonic() - fetch_started
+
+        compute_started = time.monotonic()
+        ids = data[:, 0].astype(np.int64)
+        scores = score_many(
+            data[:, 2],
+            data[:, 3],
+            (now - data[:, 4]) / 86400.0,
+            (now - data[:, 5]) / 86400.0,
+        )
+        changed = ~np.isclose(scores, data[:, 6], rtol=0.0, atol=5e-5)
+        totals["compute_seconds"] += time.monotonic() - compute_started
+
+        write_started = time.monotonic()
+        updated = int(changed.sum())
+        if updated and not dry_run:
+            updated = _write(
+                np,
+                ids[changed],
+                data[changed, 1].astype(np.int64),
+                scores[changed],
+                data[changed, 7].astype(np.int64),
+                db,
+            )
+        totals["write_seconds"] += time.monotonic() - write_started
+
+        totals["scanned"] += len(rows)
+        totals["updated"] += updated
+        last_id = int(ids[-1])
+
+    totals["seconds"] = time.monotonic() - started
+    totals["rows_per_second"] = totals["scanned"] / totals["seconds"] if totals["seconds"] else 0.0
+    return totals
+
+
+@contextmanager
+def _try_lock(db):
+    """Yield True if this process may run the recompute now, False if another one already is."""
+    if isinstance(db, PostgresqlDatabase):
+        acquired = db.execute_sql("SELECT pg_try_advisory_lock(%s)", (_ADVISORY_LOCK_ID,)).fetchone()[0]
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                db.execute_sql("SELECT pg_advisory_unlock(%s)", (_ADVISORY_LOCK_ID,))
+        return
+
+    try:
+        import fcntl
+    except ImportError:
+        yield True
+        return
+    with open(f"{db.database}.recompute.lock", "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _run_scheduled(interval: int, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            with database.connection_context(), _try_lock(database) as acquired:
+                if not acquired:
+                    continue
+                totals = recompute_all()
+            logger.info(
+                "Recomputed %d probability scores (%d changed) in %.2fs.",
+                totals["scanned"],
+                totals["updated"],
+                totals["seconds"],
+            )
+        except Exception:
+            logger.exception("Scheduled probability recompute failed.")
+
+
+_scheduler = None
+
+
+def start_scheduler(interval: int = PROBABILITY_RECOMPUTE_INTERVAL_SECONDS):
+    """Recompute every `interval` seconds on a daemon thread; one worker at a time runs it."""
+    global _scheduler
+    if interval <= 0 or _scheduler is not None:
+        return None
+    stop = threading.Event()
+    _scheduler = threading.Thread(
+        target=_run_scheduled, args=(interval, stop), name="probability-recompute", daemon=True
+    )
+    _scheduler.start()
+    return stop
@@ -0,0 +1,183 @@
+"""Danish pronunciation audio, synthesized once and kept in a content-addressed on-disk store."""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from . import background, fake_backends, metrics, singleflight
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Synthesize audio in the background when entries and examples are saved, so first plays hit the store.
+AUDIO_PRESYNTHESIS = os.getenv("AUDIO_PRESYNTHESIS", "on").strip().lower() not in ("", "off", "0", "false", "no")
+AUDIO_PREFETCH_WORKERS = int(os.getenv("AUDIO_PREFETCH_WORKERS", "1"))
+
+LANGUAGE_CODE = "da-DK"
+VOICE_GENDER = "FEMALE"
+AUDIO_ENCODING = "MP3"
+MIMETYPE = "audio/mpeg"
+
+# Size sweeps walk the whole store, so only run one every N writes.
+_EVICT_EVERY_WRITES = 50
+# Reads refresh a file's mtime (its LRU position) at most this often.
+_TOUCH_INTERVAL_SECONDS = 3600
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+_tts_duration = metrics.histogram(
+    "tts_request_duration_seconds", "Latency of Google Text-to-Speech calls by call site."
+)
+_tts_requests = metrics.counter("tts_requests_total", "Google Text-to-Speech calls by call site and outcome.")
+_tts_characters = metrics.counter("tts_characters_total", "Characters sent to Google Text-to-Speech.")
+_cache_requests = metrics.counter("audio_cache_requests_total", "Pronunciation audio store lookups by result.")
+_cache_bytes = metrics.gauge("audio_cache_bytes", "Bytes in the pronunciation audio store at the last sweep.")
+
+_tts_client = None
+_lock = threading.Lock()
+_writes = 0
+_pool = background.Pool("audio-prefetch", AUDIO_PREFETCH_WORKERS)
+
+
+def _get_tts_client():
+    global _tts_client
+    if _tts_client is None:
+        if fake_backends.enabled("tts"):
+            _tts_client = fake_backends.FakeTextToSpeechClient()
+        else:
+            from google.cloud import texttospeech
+
+            _tts_client = texttospeech.TextToSpeechClient()
+    return _tts_client
+
+
+def audio_key(text: str) -> str:
+    """Content address of the audio for `text` in the configured voice and encoding."""
+    payload = f"{LANGUAGE_CODE}:{VOICE_GENDER}:{AUDIO_ENCODING}:{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def path_for(key: str) -> Path:
+    if not _KEY_PATTERN.match(key or ""):
+        raise ValueError("Invalid audio key.")
+    return Path(AUDIO_CACHE_DIR) / key[:2] / f"{key}.mp3"
+
+
+def _synthesize(text: str) -> bytes:
+    # Imported on first use: the Text-to-Speech SDK dominates worker boot time otherwise.
+    from google.cloud import texttospeech
+
+    synthesis_input = texttospeech.SynthesisInput(text=text)
+    voice = texttospeech.VoiceSelectionParams(
+        language_code=LANGUAGE_CODE,
+        ssml_gender=texttospeech.SsmlVoiceGender[VOICE_GENDER],
+    )
+    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding[AUDIO_ENCODING])
+    _tts_characters.inc(len(text))
+    with metrics.track(_tts_duration, _tts_requests, call_site="pronunciation"):
+        response = _get_tts_client().synthesize_speech(
+            input=synthesis_input,
+            voice=voice,
+            audio_config=audio_config,
+        )
+    return response.audio_content
+
+
+def cached_path(key: str) -> Path | None:
+    """Return the stored file for `key`, marking it recently used, or None if absent."""
+    path = path_for(key)
+    try:
+        modified = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    now = time.time()
+    if now - modified > _TOUCH_INTERVAL_SECONDS:
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+    return path
+
+
+def _store(key: str, audio: bytes) -> None:
+    global _writes
+    path = path_for(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    temp_path.write_bytes(audio)
+    # Atomic rename, so other workers never read a partially written file.
+    os.replace(temp_path, path)
+
+    with _lock:
+        _writes += 1
+        sweep = _writes % _EVICT_EVERY_WRITES == 1
+    if sweep:
+        evict()
+
+
+def ensure(text: str) -> str:
+    """Make sure audio for `text` is stored, synthesizing it if needed, and return its key."""
+    key = audio_key(text)
+    if cached_path(key) is not None:
+        _cache_requests.inc(result="hit")
+        return key
+
+    _cache_requests.inc(result="miss")
+
+    def _synthesize_and_store():
+        if cached_path(key) is None:
+            _store(key, _synthesize(text))
+        return key
+
+    # Concurrent first plays of the same text share one TTS call.
+    return singleflight.do(f"tts:{key}", _synthesize_and_store)
+
+
+def schedule(texts) -> int:
+    """Queue background synthesis for each text not stored yet; returns how many were queued."""
+    if not AUDIO_PRESYNTHESIS:
+        return 0
+    queued = 0
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        key = audio_key(text)
+        if path_for(key).exists():
+            continue
+        if _pool.submit_once(key, ensure, text) is not None:
+            queued += 1
+    return queued
+
+
+def evict(max_bytes: int | None = None) -> int:
+    """Delete least recently used files until the store fits its size cap; returns files removed."""
+    max_bytes = AUDIO_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    total = 0
+    for path in Path(AUDIO_CACHE_DIR).glob("*/*.mp3"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    if max_bytes > 0 and total > max_bytes:
+        # Trim to 90% of the cap so the next few writes do not trigger another sweep.
+        target = int(max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+    _cache_bytes.set(total)
+    return removed
@@ -0,0 +1,212 @@
+"""Circuit breakers with latency budgets for calls to external backends."""
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from . import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_state_gauge = metrics.gauge(
+    "circuit_breaker_state", "Circuit breaker state per backend (0 closed, 1 half-open, 2 open)."
+)
+_rejections_total = metrics.counter(
+    "circuit_breaker_rejections_total", "Calls refused because the backend's circuit was open."
+)
+_failures_total = metrics.counter(
+    "circuit_breaker_failures_total", "Backend calls that failed or exceeded their latency budget."
+)
+
+_bulkhead_rejections_total = metrics.counter(
+    "bulkhead_rejections_total", "Calls refused because every call slot for the backend was busy."
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose circuit is open."""
+
+
+class BulkheadFullError(CircuitOpenError):
+    """Raised instead of queueing a call when all of a backend's call slots are busy."""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker. `failure_threshold` consecutive failures open the
+    circuit; after `reset_timeout` seconds one probe call is let through (half-open)
+    and its outcome closes or re-opens it. Calls slower than `latency_budget`
+    seconds count as failures.
+
+    Calls run on the breaker's own pool of `max_concurrent` threads (a bulkhead),
+    so callers can stop waiting once a budget is spent and a hung backend can
+    only tie up its own slots.
+
+    Exceptions for which `is_local_error(exc)` is true (e.g. our own overload
+    shedding) say nothing about the backend and are recorded as neither outcome.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        latency_budget: float | None,
+        max_concurrent: int = 8,
+        is_local_error=None,
+    ):
+        self.name = name
+        self.is_local_error = is_local_error
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.latency_budget = latency_budget
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies = deque(maxlen=200)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent), thread_name_prefix=f"{name}-call")
+        _state_gauge.set(_STATE_VALUES[CLOSED], backend=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        _state_gauge.set(_STATE_VALUES[state], backend=self.name)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency: float, budget: float | None = None) -> None:
+        budget = self.latency_budget if budget is None else budget
+        if budget and latency > budget:
+            self.record_failure()
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        _failures_total.inc(backend=self.name)
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def record_skipped(self) -> None:
+        """Settle a call that never reached the backend, freeing the half-open probe for the next one."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Return the given percentile of recent successful latencies, in seconds."""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 20:
+            return None
+        rank = min(len(samples) - 1, max(0, math.ceil(percentile / 100.0 * len(samples)) - 1))
+        return samples[rank]
+
+    def submit(self, fn, *args, budget: float | None = None, **kwargs):
+        """Start `fn` on the backend pool and return its future; outcomes feed the breaker."""
+        if not self._slots.acquire(blocking=False):
+            _bulkhead_rejections_total.inc(backend=self.name)
+            raise BulkheadFullError(f"Every {self.name} call slot is busy.")
+        if not self.allow():
+            self._slots.release()
+            _rejections_total.inc(backend=self.name)
+            raise CircuitOpenError(f"The {self.name} circuit is open.")
+
+        started = time.monotonic()
+        # Whichever comes first, the call's outcome or `abandon`, is the one the breaker records.
+        settled = threading.Lock()
+
+        def _call():
+            try:
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as exc:
+                    if settled.acquire(blocking=False):
+                        if self.is_local_error is not None and self.is_local_error(exc):
+                            self.record_skipped()
+                        else:
+                            self.record_failure()
+                    raise
+                if settled.acquire(blocking=False):
+                    self.record_success(time.monotonic() - started, budget)
+                return result
+            finally:
+                self._slots.release()
+
+        # Executor threads do not inherit contextvars; carry the caller's (e.g. the request's user) along.
+        future = self._executor.submit(contextvars.copy_context().run, _call)
+        future.breaker_settled = settled
+        return future
+
+    def abandon(self, future) -> None:
+        """
+        Count a submitted call the caller has stopped waiting for as a failure now,
+        instead of whenever (if ever) it returns.
+        """
+        settled = getattr(future, "breaker_settled", None)
+        if settled is not None and settled.acquire(blocking=False):
+            self.record_failure()
+
+    def call(self, fn, *args, budget: float | None = None, **kwargs):
+        """Run `fn`, waiting at most the latency budget for it before raising TimeoutError."""
+        budget = self.latency_budget if budget is None else budget
+        future = self.submit(fn, *args, budget=budget, **kwargs)
+        try:
+            return future.result(timeout=budget or None)
+        except FutureTimeoutError as exc:
+            self.abandon(future)
+            raise TimeoutError(f"The {self.name} call exceeded its {budget:.2f}s budget.") from exc
+
+
+def first_result(futures: dict, timeout: float | None):
+    """
+    Wait for the first of {name: future} to succeed and return (name, result).
+    Raises the last failure, or TimeoutError if nothing succeeded in time.
+    """
+    names = {future: name for name, future in futures.items()}
+    pending = set(names)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    last_error = None
+    while pending:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            error = future.exception()
+            if error is None:
+                return names[future], future.result()
+            last_error = error
+    if last_error is not None:
+        raise last_error
+    raise TimeoutError("No backend answered within the latency budget.")
@@ -0,0 +1,171 @@
+"""
+Coalesce concurrent identical calls to external services into one in-flight call.
+
+Within a worker, callers with the same key wait on the first caller's thread.
+Across workers on the box, a local SQLite lock table elects one leader per key
+and hands its text or bytes result to the other workers when it finishes.
+"""
+import logging
+import os
+import threading
+import time
+
+from . import local_store, metrics
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT = os.getenv("SINGLEFLIGHT", "on").strip().lower() not in ("", "off", "0", "false", "no")
+SINGLEFLIGHT_PATH = os.getenv("SINGLEFLIGHT_PATH", "singleflight.db")
+# How long to wait for another caller's call, in this worker or another, before making our own.
+SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "30"))
+
+_POLL_SECONDS = 0.05
+# Finished rows only need to outlive the waiters' polling interval.
+_RESULT_TTL_SECONDS = 5.0
+
+_coalesced_total = metrics.counter(
+    "singleflight_coalesced_total", "Calls that reused another caller's in-flight result."
+)
+
+_lock = threading.Lock()
+_calls = {}
+_table_ready = False
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def do(key: str, fn):
+    """Return fn(), sharing one execution among concurrent callers that pass the same key."""
+    if not SINGLEFLIGHT:
+        return fn()
+
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if not call.event.wait(SINGLEFLIGHT_WAIT_SECONDS):
+            # The leader is stuck; don't let it hold every waiting request thread with it.
+            logger.warning(
+                "Single-flight leader for %s still running after %.1fs; calling directly.",
+                key,
+                SINGLEFLIGHT_WAIT_SECONDS,
+            )
+            return fn()
+        _coalesced_total.inc(scope="process")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _do_across_workers(key, fn)
+        return call.result
+    except BaseException as exc:
+        call.error = exc
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.event.set()
+
+
+def _conn():
+    global _table_ready
+    conn = local_store.connect(SINGLEFLIGHT_PATH)
+    if not _table_ready:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight ("
+            "key TEXT PRIMARY KEY, owner TEXT NOT NULL, started_at REAL NOT NULL, "
+            "finished_at REAL, kind TEXT, value BLOB)"
+        )
+        _table_ready = True
+    return conn
+
+
+def _encode(value):
+    if isinstance(value, str):
+        return "text", value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return "bytes", bytes(value)
+    return None, None
+
+
+def _decode(kind, value):
+    return value.decode("utf-8") if kind == "text" else bytes(value)
+
+
+def _do_across_workers(key: str, fn):
+    try:
+        conn = _conn()
+    except Exception:
+        logger.exception("Single-flight lock table unavailable.")
+        return fn()
+
+    owner = f"{os.getpid()}:{threading.get_ident()}"
+    deadline = time.monotonic() + SINGLEFLIGHT_WAIT_SECONDS
+    while True:
+        now = time.time()
+        conn.execute(
+            "DELETE FROM inflight WHERE (finished_at IS NOT NULL AND finished_at < ?) OR started_at < ?",
+            (now - _RESULT_TTL_SECONDS, now - SINGLEFLIGHT_WAIT_SECONDS),
+        )
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO inflight (key, owner, started_at) VALUES (?, ?, ?)",
+            (key, owner, now),
+        ).rowcount
+        if inserted:
+            return _lead(conn, key, owner, fn)
+
+        # A call that finished before we arrived is not ours to share; take the row over.
+        taken_over = conn.execute(
+            "UPDATE inflight SET owner = ?, started_at = ?, finished_at = NULL, kind = NULL, value = NULL "
+            "WHERE key = ? AND finished_at IS NOT NULL",
+            (owner, now, key),
+        ).rowcount
+        if taken_over:
+            return _lead(conn, key, owner, fn)
+
+        result = _wait_for_leader(conn, key, deadline)
+        if result is not None:
+            _coalesced_total.inc(scope="workers")
+            return result[0]
+        if time.monotonic() >= deadline:
+            return fn()
+
+
+def _lead(conn, key: str, owner: str, fn):
+    try:
+        value = fn()
+    except BaseException:
+        conn.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+        raise
+
+    kind, encoded = _encode(value)
+    if kind is None:
+        conn.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+    else:
+        conn.execute(
+            "UPDATE inflight SET finished_at = ?, kind = ?, value = ? WHERE key = ? AND owner = ?",
+            (time.time(), kind, encoded, key, owner),
+        )
+    return value
+
+
+def _wait_for_leader(conn, key: str, deadline: float):
+    """Poll until the leader publishes a result; None if it failed, vanished or timed out."""
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        row = conn.execute("SELECT finished_at, kind, value FROM inflight WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        finished_at, kind, value = row
+        if finished_at is not None:
+            return (_decode(kind, value),)
+    return None
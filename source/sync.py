@@ -0,0 +1,78 @@
+"""Per-user change sequence behind the /sync delta endpoint, with tombstones for deleted entries."""
+from datetime import datetime
+
+from peewee import DateTimeField, ForeignKeyField, IntegerField
+
+from .base import Base
+from .database import database
+from .dictionary_entry import DictionaryEntry
+from .user import User
+
+
+class EntryTombstone(Base):
+    user = ForeignKeyField(User, backref="entry_tombstones", on_delete="CASCADE")
+    # Not a foreign key: the entry row is gone by the time a client asks.
+    entry_id = IntegerField(null=False)
+    change_seq = IntegerField(null=False)
+    deleted_at = DateTimeField(default=datetime.utcnow, null=False)
+
+    class Meta:
+        indexes = ((("user", "change_seq"), False),)
+
+
+def _next_seq(user_id: int) -> int:
+    # The row lock taken by this UPDATE is held until commit, so sequence numbers commit in order.
+    User.update(change_seq=User.change_seq + 1).where(User.id == user_id).execute()
+    return User.select(User.change_seq).where(User.id == user_id).scalar()
+
+
+def current_seq(user_id: int) -> int:
+    return User.select(User.change_seq).where(User.id == user_id).scalar() or 0
+
+
+def touch(entry: DictionaryEntry) -> int:
+    """Stamp the entry with the user's next change sequence number; call after changing it."""
+    now = datetime.utcnow()
+    with database.atomic():
+        seq = _next_seq(entry.user_id)
+        DictionaryEntry.update(change_seq=seq, updated_at=now).where(DictionaryEntry.id == entry.id).execute()
+    entry.change_seq = seq
+    entry.updated_at = now
+    return seq
+
+
+def delete_entry(entry: DictionaryEntry) -> int:
+    """Delete the entry, leaving a tombstone so syncing clients drop it too."""
+    with database.atomic():
+        seq = _next_seq(entry.user_id)
+        EntryTombstone.create(user=entry.user_id, entry_id=entry.id, change_seq=seq)
+        entry.delete_instance()
+    return seq
+
+
+def changes_since(user, since: int, limit: int):
+    """
+    Entries changed and ids deleted after `since`, oldest change first and at
+    most `limit` of them together. Returns (entries, deleted_ids, token,
+    has_more); pass `token` as the next `since`.
+    """
+    entries = list(
+        DictionaryEntry.select()
+        .where((DictionaryEntry.user == user) & (DictionaryEntry.change_seq > since))
+        .order_by(DictionaryEntry.change_seq)
+        .limit(limit + 1)
+    )
+    tombstones = list(
+        EntryTombstone.select()
+        .where((EntryTombstone.user == user) & (EntryTombstone.change_seq > since))
+        .order_by(EntryTombstone.change_seq)
+        .limit(limit + 1)
+    )
+    merged = sorted(entries + tombstones, key=lambda row: row.change_seq)
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    token = merged[-1].change_seq if merged else since
+    changed = [row for row in merged if isinstance(row, DictionaryEntry)]
+    deleted = [row.entry_id for row in merged if isinstance(row, EntryTombstone)]
+    return changed, deleted, token, has_more
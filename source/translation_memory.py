@@ -0,0 +1,195 @@
+"""Shared translation memory checked before calling any translation backend."""
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+
+from peewee import CharField, DateTimeField, IntegerField, TextField
+
+from .base import Base
+
+TRANSLATION_MEMORY_POLICY = os.getenv("TRANSLATION_MEMORY_POLICY", "lru").strip().lower()
+TRANSLATION_MEMORY_MAX_ROWS = int(os.getenv("TRANSLATION_MEMORY_MAX_ROWS", "100000"))
+TRANSLATION_MEMORY_TTL_DAYS = int(os.getenv("TRANSLATION_MEMORY_TTL_DAYS", "180"))
+# LLM fallbacks expire sooner so the next lookup gets a chance to use Google again.
+TRANSLATION_MEMORY_LLM_TTL_DAYS = int(os.getenv("TRANSLATION_MEMORY_LLM_TTL_DAYS", "7"))
+
+# Refreshing last_used_at on every hit would turn each read into a write.
+_TOUCH_INTERVAL = timedelta(hours=1)
+_EVICT_EVERY_WRITES = 200
+_writes = 0
+
+
+class TranslationMemory(Base):
+    source_hash = CharField(max_length=64, null=False)
+    target_language = CharField(max_length=16, null=False)
+    source_text = TextField(null=False)
+    translation = TextField(null=False)
+    backend = CharField(max_length=16, null=False)
+    created_at = DateTimeField(default=datetime.utcnow, null=False)
+    last_used_at = DateTimeField(default=datetime.utcnow, null=False)
+    # Bumped together with last_used_at, at most once per _TOUCH_INTERVAL: it counts touches, not hits.
+    touch_count = IntegerField(default=0, null=False)
+
+    class Meta:
+        indexes = (
+            (("source_hash", "target_language"), True),
+            (("last_used_at",), False),
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{{id={self.id} target_language={self.target_language} backend={self.backend} "
+            f"source_text={self.source_text!r} translation={self.translation!r}}}"
+        )
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace only: case can change the translation ("Turkey"/"turkey", "March"/"march").
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+def _source_hash(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _ttl_for(backend: str):
+    days = TRANSLATION_MEMORY_LLM_TTL_DAYS if backend == "llm" else TRANSLATION_MEMORY_TTL_DAYS
+    return timedelta(days=days) if days > 0 else None
+
+
+def lookup(text: str, target_language: str):
+    """Return the remembered translation for `text`, or None."""
+    normalized = normalize_text(text)
+    if not normalized:
+        return None
+
+    row = TranslationMemory.get_or_none(
+        (TranslationMemory.source_hash == _source_hash(normalized))
+        & (TranslationMemory.target_language == target_language)
+    )
+    if row is None:
+        return None
+
+    now = datetime.utcnow()
+    ttl = _ttl_for(row.backend)
+    if ttl is not None and row.created_at and now - row.created_at > ttl:
+        row.delete_instance()
+        return None
+
+    if not row.last_used_at or now - row.last_used_at > _TOUCH_INTERVAL:
+        TranslationMemory.update(
+            last_used_at=now, touch_count=TranslationMemory.touch_count + 1
+        ).where(TranslationMemory.id == row.id).execute()
+    return row.translation
+
+
+def lookup_many(texts, target_language: str) -> dict:
+    """Return {normalized text: translation} for every remembered text, in one query."""
+    hashes = {}
+    for text in texts:
+        normalized = normalize_text(text)
+        if normalized:
+            hashes[_source_hash(normalized)] = normalized
+    if not hashes:
+        return {}
+
+    now = datetime.utcnow()
+    found = {}
+    stale_ids = []
+    for row in TranslationMemory.select().where(
+        (TranslationMemory.source_hash.in_(list(hashes)))
+        & (TranslationMemory.target_language == target_language)
+    ):
+        ttl = _ttl_for(row.backend)
+        if ttl is not None and row.created_at and now - row.created_at > ttl:
+            continue
+        found[hashes[row.source_hash]] = row.translation
+        if not row.last_used_at or now - row.last_used_at > _TOUCH_INTERVAL:
+            stale_ids.append(row.id)
+
+    if stale_ids:
+        TranslationMemory.update(
+            last_used_at=now, touch_count=TranslationMemory.touch_count + 1
+        ).where(TranslationMemory.id.in_(stale_ids)).execute()
+    return found
+
+
+def record(text: str, target_language: str, translation: str, backend: str) -> None:
+    """Remember `translation` for `text`, replacing any previous entry."""
+    record_many([(text, translation)], target_language, backend)
+
+
+def record_many(pairs, target_language: str, backend: str) -> None:
+    """Remember (text, translation) pairs produced by `backend` in one statement."""
+    global _writes
+    now = datetime.utcnow()
+    rows = {}
+    for text, translation in pairs:
+        normalized = normalize_text(text)
+        if not normalized or not (translation or "").strip():
+            continue
+        rows[_source_hash(normalized)] = {
+            "source_hash": _source_hash(normalized),
+            "target_language": target_language,
+            "source_text": normalized,
+            "translation": translation,
+            "backend": backend,
+            "created_at": now,
+            "last_used_at": now,
+        }
+    if not rows:
+        return
+
+    (
+        TranslationMemory.insert_many(list(rows.values()))
+        .on_conflict(
+            conflict_target=[TranslationMemory.source_hash, TranslationMemory.target_language],
+            preserve=[
+                TranslationMemory.translation,
+                TranslationMemory.backend,
+                TranslationMemory.created_at,
+                TranslationMemory.last_used_at,
+            ],
+        )
+        .execute()
+    )
+
+    previous = _writes
+    _writes += len(rows)
+    if _writes // _EVICT_EVERY_WRITES != previous // _EVICT_EVERY_WRITES:
+        evict()
+
+
+def evict() -> int:
+    """
+    Apply the eviction policy: drop expired rows, then trim to the row cap by
+    least-recent use (`lru`) or by insertion order (`fifo`).
+    """
+    now = datetime.utcnow()
+    removed = 0
+    for backend in ("google", "llm"):
+        ttl = _ttl_for(backend)
+        if ttl is None:
+            continue
+        removed += (
+            TranslationMemory.delete()
+            .where((TranslationMemory.backend == backend) & (TranslationMemory.created_at < now - ttl))
+            .execute()
+        )
+
+    if TRANSLATION_MEMORY_MAX_ROWS > 0:
+        excess = TranslationMemory.select().count() - TRANSLATION_MEMORY_MAX_ROWS
+        if excess > 0:
+            order_field = (
+                TranslationMemory.created_at
+                if TRANSLATION_MEMORY_POLICY == "fifo"
+                else TranslationMemory.last_used_at
+            )
+            oldest = (
+                TranslationMemory.select(TranslationMemory.id)
+                .order_by(order_field.asc())
+                .limit(excess)
+            )
+            removed += TranslationMemory.delete().where(TranslationMemory.id.in_(oldest)).execute()
+    return removed
@@ -1,5 +1,5 @@
 """User model for authentication."""
-from peewee import CharField
+from peewee import CharField, IntegerField
 
 from .base import Base
 
@@ -7,6 +7,8 @@ from .base import Base
 class User(Base):
     username = CharField(unique=True)
     password_hash = CharField()
+    # Last change sequence number handed out to this user's entries; see source/sync.py.
+    change_seq = IntegerField(default=0, null=False)
 
 
 __all__ = ["User"]
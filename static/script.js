@@ -1,6 +1,23 @@
 // Frontend logic for auth, dictionary entries, translations, practice flows, and progress UI.
 const SAVED_CREDENTIALS_KEY = "auth.savedCredentials.v1";
 
+// What the list and practice views read; the entry modal loads examples on its own.
+const ENTRY_LIST_FIELDS = [
+    "id",
+    "text",
+    "translation",
+    "created_at",
+    "is_external_input",
+    "exercise_count",
+    "probability_score",
+];
+
+// Local copy of the user's entries, kept current with /sync deltas.
+const syncState = {
+    token: null,
+    entries: new Map(),
+};
+
 const authState = {
     authenticated: false,
     username: null,
@@ -52,6 +69,9 @@ const entryModalState = {
     examples: [],
 };
 
+// Danish text -> its /audio/<key>.mp3 URL; that response is immutable, so replays come from the HTTP cache.
+const pronunciationUrls = new Map();
+
 function toDisplayText(value) {
     return (value ?? "").toString().trim();
 }
@@ -220,6 +240,7 @@ function normalizeEntryForDisplay(entry) {
     const normalizedExamples = Array.isArray(entry.examples)
         ? entry.examples
               .map((ex) => ({
+                  id: ex.id ?? null,
                   danish: toDisplayText(ex.danish),
                   english: toDisplayText(ex.english),
               }))
@@ -290,47 +311,28 @@ function markEntryIncorrectOnce(entryId) {
     practiseState.activeEntryMarkedIncorrect = true;
 }
 
-function selectPractiseTarget() {
+// The server draws the next entry weighted by probability_score, never repeating the active one.
+async function selectPractiseTarget() {
     if (!practiseState.entries || practiseState.entries.length === 0) {
         return null;
     }
 
-    const candidates = practiseState.entries.filter((entry) => entry && entry.id);
-    if (candidates.length === 0) {
-        return null;
-    }
-
-    const minWeight = 0.01;
-    const weights = candidates.map((entry) => {
-        const parsed = Number(entry.probability_score);
-        const baseWeight = Number.isFinite(parsed) && parsed > 0 ? parsed : 0.8;
-        return Math.max(minWeight, baseWeight);
-    });
-    const total = weights.reduce((sum, value) => sum + value, 0);
-    if (!Number.isFinite(total) || total <= 0) {
-        return candidates[Math.floor(Math.random() * candidates.length)] || null;
-    }
-
-    let draw = Math.random() * total;
-    let selected = candidates[0];
-    for (let i = 0; i < candidates.length; i += 1) {
-        draw -= weights[i];
-        if (draw <= 0) {
-            selected = candidates[i];
-            break;
+    const params = practiseState.activeEntryId ? `?exclude=${encodeURIComponent(practiseState.activeEntryId)}` : "";
+    try {
+        const response = await fetch(`/practise/next${params}`);
+        if (response.status === 401) {
+            updateAuthState(false, null);
+            return null;
         }
-    }
-
-    if (candidates.length > 1 && Number(selected.id) === Number(practiseState.activeEntryId)) {
-        const withoutActive = candidates.filter(
-            (entry) => Number(entry.id) !== Number(practiseState.activeEntryId)
-        );
-        if (withoutActive.length > 0) {
-            selected = withoutActive[Math.floor(Math.random() * withoutActive.length)];
+        const data = await response.json();
+        if (!response.ok || !data.entry) {
+            return null;
         }
+        return findEntryById(data.entry.id) || normalizeEntryForDisplay(data.entry);
+    } catch (error) {
+        console.error("Error selecting the next practise entry:", error);
+        return null;
     }
-
-    return selected;
 }
 
 function detectDirectionFromText(text, fallback = "en-da") {
@@ -977,7 +979,7 @@ async function prepareClozeQuestion() {
     practiseState.clozeLoading = true;
     practiseState.clozeQuestion = null;
 
-    const target = selectPractiseTarget();
+    const target = await selectPractiseTarget();
 
     if (!target) {
         practiseState.clozeLoading = false;
@@ -1073,7 +1075,7 @@ async function prepareAiPractiseQuestion() {
     practiseState.aiQuestion = null;
     setAiPractiseLoading();
 
-    const target = selectPractiseTarget();
+    const target = await selectPractiseTarget();
 
     if (!target) {
         practiseState.aiLoading = false;
@@ -1752,6 +1754,40 @@ async function SaveToDatabase() {
     }
 }
 
+function resetSyncState() {
+    syncState.token = null;
+    syncState.entries.clear();
+}
+
+// Pull every change since the last sync into syncState; false if the session has expired.
+async function syncEntries() {
+    let hasMore = true;
+    while (hasMore) {
+        const since = syncState.token ?? "0";
+        const response = await fetch(
+            `/sync?since=${encodeURIComponent(since)}&fields=${ENTRY_LIST_FIELDS.join(",")}`
+        );
+
+        if (response.status === 401) {
+            updateAuthState(false, null);
+            return false;
+        }
+        if (!response.ok) {
+            throw new Error(`Sync failed with status ${response.status}`);
+        }
+
+        const data = await response.json();
+        if (data.reset) {
+            syncState.entries.clear();
+        }
+        (data.deleted || []).forEach((id) => syncState.entries.delete(id));
+        (data.entries || []).forEach((entry) => syncState.entries.set(entry.id, entry));
+        syncState.token = data.token;
+        hasMore = Boolean(data.has_more);
+    }
+    return true;
+}
+
 async function fetchEntries() {
     const list = document.getElementById("entriesList");
     if (!list || !authState.authenticated) {
@@ -1759,15 +1795,12 @@ async function fetchEntries() {
     }
 
     try {
-        const response = await fetch("/entries");
-
-        if (response.status === 401) {
-            updateAuthState(false, null);
+        if (!(await syncEntries())) {
             return;
         }
 
-        const data = await response.json();
-        renderEntries(data.entries);
+        const entries = Array.from(syncState.entries.values()).sort((a, b) => b.id - a.id);
+        renderEntries(entries);
         fetchProgress(progressState.windowDays);
     } catch (error) {
         console.error("Error fetching entries:", error);
@@ -1846,6 +1879,9 @@ function switchView(view) {
 }
 
 function updateAuthState(authenticated, username) {
+    if (!authenticated || username !== authState.username) {
+        resetSyncState();
+    }
     authState.authenticated = Boolean(authenticated);
     authState.username = authenticated ? username : null;
 
@@ -1900,6 +1936,7 @@ function showEntryDetails(entry) {
     entryModalState.entryText = toDisplayText(entry.translation || entry.text);
     entryModalState.example = entry.example || null;
     entryModalState.examples = Array.isArray(entry.examples) ? entry.examples.map((ex) => ({
+        id: ex.id ?? null,
         danish: toDisplayText(ex.danish),
         english: toDisplayText(ex.english),
     })) : (entry.example ? [entry.example] : []);
@@ -1910,12 +1947,52 @@ function showEntryDetails(entry) {
         : "🇩🇰 No Danish text yet";
     englishLine.textContent = toDisplayText(entry.text) || "No English text yet";
     pronounceButton.dataset.entryId = entry.id;
+    pronounceButton.dataset.text = danishWord;
     pronounceButton.classList.toggle("is-hidden", !entry.translation);
 
-    renderEntryExamples(entryModalState.examples);
+    if (entryModalState.examples.length > 0) {
+        renderEntryExamples(entryModalState.examples);
+    } else {
+        const list = document.getElementById("entryModalExamples");
+        if (list) {
+            list.innerHTML = '<p class="modal__example-empty">Loading examples…</p>';
+        }
+    }
     exampleButton.removeAttribute("disabled");
 
     modal.classList.remove("modal--hidden");
+    loadEntryExamples(entry.id);
+}
+
+async function loadEntryExamples(entryId) {
+    let examples = null;
+    try {
+        const response = await fetch(`/entries/${entryId}/examples`);
+        if (response.status === 401) {
+            updateAuthState(false, null);
+            return;
+        }
+        if (response.ok) {
+            const data = await response.json();
+            examples = (data.examples || []).map((ex) => ({
+                id: ex.id ?? null,
+                danish: toDisplayText(ex.danish),
+                english: toDisplayText(ex.english),
+            }));
+        }
+    } catch (error) {
+        console.error("Error loading examples:", error);
+    }
+
+    // The modal may have moved on to another entry while this was loading.
+    if (entryModalState.entryId !== entryId) {
+        return;
+    }
+    if (examples) {
+        entryModalState.examples = examples;
+        entryModalState.example = examples[0] || null;
+    }
+    renderEntryExamples(entryModalState.examples);
 }
 
 function renderEntryExamples(examples) {
@@ -1931,6 +2008,7 @@ function renderEntryExamples(examples) {
     const normalized = Array.isArray(examples)
         ? examples
               .map((ex) => ({
+                  id: ex.id ?? null,
                   danish: toDisplayText(ex.danish),
                   english: toDisplayText(ex.english),
               }))
@@ -1944,7 +2022,7 @@ function renderEntryExamples(examples) {
         return;
     }
 
-    normalized.forEach((ex, index) => {
+    normalized.forEach((ex) => {
         const item = document.createElement("div");
         item.className = "modal__example-item";
 
@@ -1957,7 +2035,7 @@ function renderEntryExamples(examples) {
         pronounce.textContent = "🔊";
         pronounce.title = "Play pronunciation";
         pronounce.addEventListener("click", () => {
-            playPronunciation(entryModalState.entryId, "example", index);
+            playPronunciation(entryModalState.entryId, "example", ex.id, ex.danish);
         });
         pronounce.disabled = !ex.danish;
         pronounce.classList.toggle("is-hidden", !ex.danish);
@@ -1971,7 +2049,8 @@ function renderEntryExamples(examples) {
         deleteButton.className = "modal__trash";
         deleteButton.title = "Delete example";
         deleteButton.textContent = "🗑";
-        deleteButton.addEventListener("click", () => deleteEntryExample(index));
+        deleteButton.addEventListener("click", () => deleteEntryExample(ex.id));
+        deleteButton.disabled = ex.id == null;
 
         head.appendChild(pronounce);
         head.appendChild(danish);
@@ -2022,6 +2101,57 @@ function renderEntryExamples(examples) {
     addButton.classList.remove("is-hidden");
 }
 
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    const dispatch = (rawEvent) => {
+        let eventName = "message";
+        const dataLines = [];
+        rawEvent.split("\n").forEach((line) => {
+            if (line.startsWith("event:")) {
+                eventName = line.slice(6).trim();
+            } else if (line.startsWith("data:")) {
+                dataLines.push(line.slice(5).trimStart());
+            }
+        });
+        if (dataLines.length > 0) {
+            onEvent(eventName, JSON.parse(dataLines.join("\n")));
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+            dispatch(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+        }
+    }
+    if (buffer.trim()) {
+        dispatch(buffer);
+    }
+}
+
+function renderEntryExampleDraft(draft) {
+    const list = document.getElementById("entryModalExamples");
+    if (!list) {
+        return;
+    }
+    const english = draft.english
+        ? `<p class="modal__example-text modal__example-text--small">${escapeHtml(draft.english)}</p>`
+        : "";
+    list.innerHTML = `<div class="modal__example-item"><p class="modal__example-text modal__example-text--danish">${escapeHtml(
+        formatDanishText(draft.danish)
+    )}</p>${english}</div>`;
+}
+
 async function showEntryExample(forceRefresh = false, append = false) {
     const exampleButton = document.getElementById("entryModalExampleButton");
     const addButton = document.getElementById("entryModalExampleAddButton");
@@ -2046,7 +2176,7 @@ async function showEntryExample(forceRefresh = false, append = false) {
             params.push("append=1");
         }
         const suffix = params.length ? `?${params.join("&")}` : "";
-        const response = await fetch(`/entries/${entryModalState.entryId}/example${suffix}`, {
+        const response = await fetch(`/entries/${entryModalState.entryId}/example/stream${suffix}`, {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
@@ -2059,15 +2189,37 @@ async function showEntryExample(forceRefresh = false, append = false) {
             return;
         }
 
-        const data = await response.json();
         if (!response.ok) {
+            const failure = await response.json().catch(() => ({}));
             list.innerHTML = `<p class="modal__example-empty">${escapeHtml(
-                data.error || "Could not load an example."
+                failure.error || "Could not load an example."
+            )}</p>`;
+            return;
+        }
+
+        const draft = { danish: "", english: "" };
+        let data = null;
+        let streamError = "";
+        await readEventStream(response, (event, payload) => {
+            if (event === "danish" || event === "english") {
+                draft[event] += payload.delta || "";
+                renderEntryExampleDraft(draft);
+            } else if (event === "done") {
+                data = payload;
+            } else if (event === "error") {
+                streamError = payload.error || "";
+            }
+        });
+
+        if (!data) {
+            list.innerHTML = `<p class="modal__example-empty">${escapeHtml(
+                streamError || "Could not load an example."
             )}</p>`;
             return;
         }
 
         let examples = (data.examples || []).map((ex) => ({
+            id: ex.id ?? null,
             danish: toDisplayText(ex.danish),
             english: toDisplayText(ex.english),
         }));
@@ -2094,8 +2246,8 @@ async function showEntryExample(forceRefresh = false, append = false) {
     }
 }
 
-async function deleteEntryExample(index) {
-    if (entryModalState.entryId == null) {
+async function deleteEntryExample(exampleId) {
+    if (entryModalState.entryId == null || exampleId == null) {
         return;
     }
     const list = document.getElementById("entryModalExamples");
@@ -2103,7 +2255,7 @@ async function deleteEntryExample(index) {
         list.innerHTML = '<p class="modal__example-empty">Removing…</p>';
     }
     try {
-        const response = await fetch(`/entries/${entryModalState.entryId}/examples/${index}`, {
+        const response = await fetch(`/entries/${entryModalState.entryId}/examples/${exampleId}`, {
             method: "DELETE",
             headers: { "Content-Type": "application/json" },
         });
@@ -2119,6 +2271,7 @@ async function deleteEntryExample(index) {
         }
 
         const updated = (data.examples || []).map((ex) => ({
+            id: ex.id ?? null,
             danish: toDisplayText(ex.danish),
             english: toDisplayText(ex.english),
         }));
@@ -2133,7 +2286,7 @@ async function deleteEntryExample(index) {
     }
 }
 
-async function playPronunciation(entryId, kind = "word", exampleIndex = 0) {
+async function playPronunciation(entryId, kind = "word", exampleId = null, text = "") {
     const button =
         kind === "example"
             ? null
@@ -2148,10 +2301,14 @@ async function playPronunciation(entryId, kind = "word", exampleIndex = 0) {
         const params = [];
         if (kind === "example") {
             params.push("kind=example");
-            params.push(`index=${exampleIndex}`);
+            if (exampleId != null) {
+                params.push(`example_id=${exampleId}`);
+            }
         }
         const suffix = params.length ? `?${params.join("&")}` : "";
-        const response = await fetch(`/entries/${entryId}/pronunciation${suffix}`);
+        const knownUrl = text ? pronunciationUrls.get(text) : null;
+        // The entry route redirects to the audio's content address; remember it for replays.
+        const response = await fetch(knownUrl || `/entries/${entryId}/pronunciation${suffix}`);
 
         if (response.status === 401) {
             updateAuthState(false, null);
@@ -2159,9 +2316,16 @@ async function playPronunciation(entryId, kind = "word", exampleIndex = 0) {
         }
 
         if (!response.ok) {
+            if (knownUrl) {
+                // Evicted from the server's audio store; ask the entry route again next time.
+                pronunciationUrls.delete(text);
+            }
             console.error("Pronunciation fetch failed");
             return;
         }
+        if (text && response.redirected) {
+            pronunciationUrls.set(text, response.url);
+        }
 
         const blob = await response.blob();
         const audioUrl = URL.createObjectURL(blob);
@@ -2587,7 +2751,12 @@ function initApp() {
             document.getElementById("entryModalPronounceButton")?.dataset.entryId || 0
         );
         if (entryId) {
-            playPronunciation(entryId);
+            playPronunciation(
+                entryId,
+                "word",
+                null,
+                document.getElementById("entryModalPronounceButton")?.dataset.text || ""
+            );
         }
     });
     document.getElementById("practiseClozeCheck")?.addEventListener("click", () => {
@@ -1,4 +1,4 @@
-const SW_VERSION = "v1";
+const SW_VERSION = "v8";
 const APP_SHELL_CACHE = `app-shell-${SW_VERSION}`;
 const STATIC_CACHE = `static-${SW_VERSION}`;
 